@@ -1,6 +1,47 @@
+import glob
+import hashlib
+import io
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 
+from column_cache import CACHE_MAX_BYTES, read_csv_cached
+from hyperloglog import HyperLogLog
+from id_encoding import canonical_id_hashes, canonical_id_keys, decode_id_column, encode_shopping_ids
+from instrumentation import stage
+from report import build_report
+from report_format import SECTIONS, check_sections
+from shopping_cli import main as cli_main
+from topk import TopK, top_k_series
+
+SHOPPING_DTYPES = {
+    'invoice_no': 'string',
+    'customer_id': 'string',
+    'gender': 'category',
+    'age': 'int16',
+    'category': 'category',
+    'quantity': 'int16',
+    'price': 'float32',
+    'payment_method': 'category',
+    'invoice_date': 'string',
+    'shopping_mall': 'category'
+}
+
+# Columns each report section reads; quantity and price are only there to derive sales
+SECTION_COLUMNS = {
+    'gender': ('gender', 'quantity', 'price'),
+    'payment': ('payment_method',),
+    'top-days': ('invoice_date', 'quantity', 'price'),
+    'malls': ('shopping_mall', 'quantity', 'price'),
+    'stats': ('customer_id', 'quantity', 'price')
+}
+
+DATE_FORMAT = '%d/%m/%Y'
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
 # Helper Functions
 
 def print_section_header(title):
@@ -20,121 +61,575 @@ def print_formatted_dataframe(df_csv, formatters):
 
 def print_top_n_with_currency(series, title, n=5):
     print(f"\n{title}:")
-    top_items = series.nlargest(n)
+    top_items = top_k_series(series, n)
     for i, (name, value) in enumerate(top_items.items(), 1):
         print(f"{i}. {name}: ${value:,.2f}")
 
 def calculate_group_statistics(df_csv, group_column, value_column, total_value):
     group_sum = df_csv.groupby(group_column, sort=False)[value_column].sum()
     percentages = (group_sum / total_value * 100).round(2)
-    
+
     return pd.DataFrame({
         'Total': group_sum,
         'Percentage': percentages
     })
 
-def analyze_shopping_data(file_path='customer_shopping_data.csv'):
-    
-    # Task 1: Read CSV with explicit datatypes
-    dtypes = {
-        'invoice_no': 'string',
-        'customer_id': 'string',
-        'gender': 'category',
-        'age': 'int16',
-        'category': 'category',
-        'quantity': 'int16',
-        'price': 'float32',
-        'payment_method': 'category',
-        'invoice_date': 'string',
-        'shopping_mall': 'category'
+def section_columns(sections=None):
+    if sections is None:
+        return None
+    needed = {name for section in check_sections(sections) for name in SECTION_COLUMNS[section]}
+    return [name for name in SHOPPING_DTYPES if name in needed]
+
+def accumulate_counts(totals, partial):
+    for key, value in partial.items():
+        totals[key] = totals.get(key, 0) + value
+
+def category_bincount(column, sales=None):
+    # One pass over the category codes gives both the group sizes and the group sales
+    codes = column.cat.codes.to_numpy()
+    categories = column.cat.categories
+    valid = codes >= 0
+    if not valid.all():
+        codes = codes[valid]
+        sales = None if sales is None else sales[valid]
+
+    counts = np.bincount(codes, minlength=len(categories))
+    present = np.flatnonzero(counts)
+    labels = categories.take(present).tolist()
+    if sales is None:
+        return dict(zip(labels, counts[present].tolist())), {}
+
+    sums = np.bincount(codes, weights=sales, minlength=len(categories))
+    return dict(zip(labels, counts[present].tolist())), dict(zip(labels, sums[present].tolist()))
+
+
+# Date parsing and time-bucketed rollups
+
+def parse_invoice_dates(dates, date_format=DATE_FORMAT):
+    # Parse each distinct string once; exports only hold a few hundred distinct dates
+    codes, uniques = pd.factorize(dates)
+    parsed = pd.to_datetime(pd.Index(uniques, dtype=object), format=date_format, errors='coerce').to_numpy()
+
+    # Missing dates come back as code -1, which picks up the trailing NaT
+    lookup = np.append(parsed, np.array(['NaT'], dtype=parsed.dtype))
+    return pd.Series(lookup.take(codes), index=dates.index, name=dates.name)
+
+def day_ordinals(dates):
+    days = np.asarray(dates, dtype='datetime64[D]')
+    valid = ~np.isnat(days)
+    return days.astype('int64'), valid
+
+def bucket_sums(keys, weights):
+    if len(keys) == 0:
+        return np.empty(0, dtype='int64'), np.empty(0, dtype='float64')
+
+    low = keys.min()
+    offsets = keys - low
+    counts = np.bincount(offsets)
+    sums = np.bincount(offsets, weights=weights)
+    present = np.flatnonzero(counts)
+    return present + low, sums[present]
+
+def daily_sales(dates, sales):
+    days, valid = day_ordinals(dates)
+    keys, sums = bucket_sums(days[valid], np.asarray(sales, dtype='float64')[valid])
+    return pd.Series(sums, index=pd.DatetimeIndex(keys.astype('datetime64[D]'), name='invoice_date'), name='sales')
+
+def rollup_sales(sales_by_date, freq='day'):
+    days, valid = day_ordinals(sales_by_date.index)
+    days = days[valid]
+    sales = sales_by_date.to_numpy(dtype='float64')[valid]
+
+    # 1970-01-01 was a Thursday, so (day + 3) % 7 puts Monday at 0
+    weekday = (days + 3) % 7
+    if freq == 'day':
+        keys = days
+    elif freq == 'week':
+        keys = days - weekday
+    elif freq == 'month':
+        keys = days.astype('datetime64[D]').astype('datetime64[M]').astype('int64')
+    elif freq == 'weekday':
+        sums = np.bincount(weekday, weights=sales, minlength=7)
+        return pd.Series(sums, index=pd.Index(WEEKDAY_NAMES, name='weekday'), name='sales')
+    else:
+        raise ValueError(f"Unknown rollup frequency: {freq}")
+
+    keys, sums = bucket_sums(keys, sales)
+    unit = 'datetime64[M]' if freq == 'month' else 'datetime64[D]'
+    return pd.Series(sums, index=pd.DatetimeIndex(keys.astype(unit).astype('datetime64[D]'), name=freq), name='sales')
+
+
+# Exact distinct counting: integer keys as deduplicated arrays, anything else in a set
+
+class ExactDistinct:
+    def __init__(self):
+        self.int_arrays = []
+        self.pending = 0
+        self.unique_ints = 0
+        self.str_keys = set()
+
+    def add_values(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind in 'iu':
+            self.int_arrays.append(values.astype('int64'))
+            self.pending += len(values)
+            # Compact once the undeduplicated tail outgrows what is already unique
+            if self.pending > max(self.unique_ints, 1 << 20):
+                self.compact()
+        else:
+            self.str_keys.update(values.tolist())
+        return self
+
+    def compact(self):
+        if len(self.int_arrays) > 1 or self.pending:
+            self.int_arrays = [pd.unique(np.concatenate(self.int_arrays))] if self.int_arrays else []
+            self.unique_ints = len(self.int_arrays[0]) if self.int_arrays else 0
+            self.pending = 0
+        return self
+
+    def int_keys(self):
+        self.compact()
+        return self.int_arrays[0] if self.int_arrays else np.empty(0, dtype='int64')
+
+    def merge(self, other):
+        self.int_arrays.extend(other.int_arrays)
+        self.pending += sum(len(values) for values in other.int_arrays)
+        self.str_keys.update(other.str_keys)
+        return self
+
+    def count(self):
+        return len(self.int_keys()) + len(self.str_keys)
+
+    def __len__(self):
+        return self.count()
+
+
+# Running aggregates so a CSV can be folded in chunk by chunk
+
+class ShoppingAggregates:
+    def __init__(self, distinct='exact', hll_precision=14, sections=None):
+        if distinct not in ('exact', 'approx'):
+            raise ValueError(f"distinct must be 'exact' or 'approx', got {distinct!r}")
+
+        self.distinct = distinct
+        self.sections = SECTIONS if sections is None else check_sections(sections)
+        self.needs_sales = any('price' in SECTION_COLUMNS[section] for section in self.sections)
+        self.total_rows = 0
+        self.total_revenue = 0.0
+        self.quantity_sum = 0
+        self.price_sum = 0.0
+        self.gender_count = {}
+        self.gender_sales = {}
+        self.payment_counts = {}
+        self.sales_by_date = {}
+        self.mall_count = {}
+        self.mall_sales = {}
+        self.customers = ExactDistinct() if distinct == 'exact' else HyperLogLog(hll_precision)
+        self.customer_spec = None
+
+    def update(self, chunk):
+        # Fused kernel: every report metric from a single pass over each column
+        # Sections that were not asked for are skipped, along with the sales derivation when nothing needs it
+        rows = len(chunk)
+        sections = self.sections
+        if self.needs_sales:
+            with stage("Sales Derivation", rows):
+                sales = self.update_totals(chunk)
+        else:
+            self.total_rows += rows
+            sales = None
+
+        if 'gender' in sections:
+            with stage("Task 2 & 3: Gender Count and Sales", rows):
+                self.update_gender(chunk, sales)
+        if 'payment' in sections:
+            with stage("Task 4: Payment Method Usage", rows):
+                self.update_payment(chunk, sales)
+        if 'malls' in sections:
+            with stage("Shopping Mall Sales", rows):
+                self.update_malls(chunk, sales)
+        if 'top-days' in sections:
+            with stage("Task 5: Day with Most Sales", rows):
+                self.update_dates(chunk, sales)
+        if 'stats' in sections:
+            with stage("Additional Statistics", rows):
+                self.update_customers(chunk)
+
+    def update_totals(self, chunk):
+        quantity = chunk['quantity'].to_numpy(dtype='float64')
+        price = chunk['price'].to_numpy(dtype='float64')
+        sales = quantity * price
+
+        self.total_rows += len(chunk)
+        self.total_revenue += float(sales.sum())
+        self.quantity_sum += int(quantity.sum())
+        self.price_sum += float(price.sum())
+        return sales
+
+    def update_gender(self, chunk, sales):
+        gender_count, gender_sales = category_bincount(chunk['gender'], sales)
+        accumulate_counts(self.gender_count, gender_count)
+        accumulate_counts(self.gender_sales, gender_sales)
+
+    def update_payment(self, chunk, sales=None):
+        payment_count, _ = category_bincount(chunk['payment_method'], sales)
+        accumulate_counts(self.payment_counts, payment_count)
+
+    def update_malls(self, chunk, sales):
+        mall_count, mall_sales = category_bincount(chunk['shopping_mall'], sales)
+        accumulate_counts(self.mall_count, mall_count)
+        accumulate_counts(self.mall_sales, mall_sales)
+
+    def update_dates(self, chunk, sales):
+        days, valid = day_ordinals(chunk['invoice_date'])
+        day_keys, day_sums = bucket_sums(days[valid], sales[valid])
+        accumulate_counts(self.sales_by_date, dict(zip(day_keys.tolist(), day_sums.tolist())))
+
+    def update_customers(self, chunk):
+        # Customer IDs are keyed as ints when they fit the prefix/width first seen, as strings otherwise.
+        # Sketches take encoding-independent hashes instead, so any two of them can be merged
+        customer_spec = chunk.attrs.get('id_encodings', {}).get('customer_id')
+        if self.distinct == 'approx':
+            self.customers.add_values(canonical_id_hashes(chunk['customer_id'], customer_spec))
+            return
+        if self.total_rows == len(chunk) and customer_spec and customer_spec['kind'] == 'prefix':
+            self.customer_spec = customer_spec
+        self.add_customer_keys(*canonical_id_keys(chunk['customer_id'], customer_spec, self.customer_spec))
+
+    def add_customer_keys(self, int_keys, str_keys):
+        self.customers.add_values(int_keys)
+        self.customers.add_values(str_keys)
+
+    def merge(self, other):
+        if other.distinct != self.distinct:
+            raise ValueError(f"Cannot merge {other.distinct} distinct counts into {self.distinct} ones")
+        if other.sections != self.sections:
+            raise ValueError(f"Cannot merge aggregates over sections {other.sections} into {self.sections}")
+        if self.total_rows == 0:
+            self.customer_spec = other.customer_spec
+
+        self.total_rows += other.total_rows
+        self.total_revenue += other.total_revenue
+        self.quantity_sum += other.quantity_sum
+        self.price_sum += other.price_sum
+
+        accumulate_counts(self.gender_count, other.gender_count)
+        accumulate_counts(self.gender_sales, other.gender_sales)
+        accumulate_counts(self.payment_counts, other.payment_counts)
+        accumulate_counts(self.sales_by_date, other.sales_by_date)
+        accumulate_counts(self.mall_count, other.mall_count)
+        accumulate_counts(self.mall_sales, other.mall_sales)
+
+        if self.distinct == 'approx' or other.customer_spec == self.customer_spec:
+            self.customers.merge(other.customers)
+        else:
+            self.merge_customer_keys(other)
+        return self
+
+    def merge_customer_keys(self, other):
+        # Re-key the other side's customers against this side's ID encoding
+        decoded = decode_id_column(pd.Series(other.customers.int_keys()), other.customer_spec)
+        strings = pd.concat([decoded, pd.Series(list(other.customers.str_keys), dtype='string')], ignore_index=True)
+        self.add_customer_keys(*canonical_id_keys(strings, None, self.customer_spec))
+
+    def gender_stats(self):
+        gender_stats = pd.DataFrame({
+            'Count': pd.Series(self.gender_count, dtype='int64'),
+            'Total Sales': pd.Series(self.gender_sales, dtype='float64')
+        })
+        gender_stats.index.name = 'gender'
+        return gender_stats
+
+    def payment_series(self):
+        counts = pd.Series(self.payment_counts, dtype='int64', name='count')
+        counts.index.name = 'payment_method'
+        return counts[counts > 0].sort_values(ascending=False, kind='stable')
+
+    def date_series(self):
+        days = np.fromiter(self.sales_by_date.keys(), dtype='int64', count=len(self.sales_by_date))
+        sales = np.fromiter(self.sales_by_date.values(), dtype='float64', count=len(self.sales_by_date))
+        order = np.argsort(days, kind='stable')
+        index = pd.DatetimeIndex(days[order].astype('datetime64[D]'), name='invoice_date')
+        return pd.Series(sales[order], index=index, name='sales')
+
+    def sales_rollup(self, freq='day'):
+        return rollup_sales(self.date_series(), freq)
+
+    def mall_stats(self):
+        mall_stats = pd.DataFrame({
+            'Count': pd.Series(self.mall_count, dtype='int64'),
+            'Total Sales': pd.Series(self.mall_sales, dtype='float64')
+        })
+        mall_stats.index.name = 'shopping_mall'
+        return mall_stats
+
+    def additional_stats(self):
+        rows = self.total_rows or 1
+        stats = {
+            'sales': self.total_revenue / rows,
+            'quantity': self.quantity_sum / rows,
+            'price': self.price_sum / rows,
+            'customer_id': len(self.customers),
+            'customer_id_mode': self.distinct
+        }
+        if self.distinct == 'approx':
+            stats['customer_id_error'] = self.customers.relative_error
+            stats['customer_id_precision'] = self.customers.precision
+        return stats
+
+
+def prepare_shopping_frame(df_csv):
+    rows = len(df_csv)
+    if 'invoice_date' in df_csv.columns:
+        with stage("Task 1: Parse Dates", rows):
+            df_csv['invoice_date'] = parse_invoice_dates(df_csv['invoice_date'])
+    with stage("Task 1: Encode IDs", rows):
+        return encode_shopping_ids(df_csv)
+
+def shopping_dtypes(columns=None):
+    return SHOPPING_DTYPES if columns is None else {name: SHOPPING_DTYPES[name] for name in columns}
+
+def load_shopping_csv(file_path, columns=None):
+    # columns prunes the read to what the requested sections use; None reads all of them
+    with stage("Task 1: Read CSV") as info:
+        df_csv = pd.read_csv(file_path, usecols=columns, dtype=shopping_dtypes(columns))
+        info['rows'] = len(df_csv)
+    return prepare_shopping_frame(df_csv)
+
+def read_shopping_chunks(file_path, chunksize, columns=None):
+    reader = iter(pd.read_csv(file_path, usecols=columns, dtype=shopping_dtypes(columns), chunksize=chunksize))
+    while True:
+        with stage("Task 1: Read CSV") as info:
+            chunk = next(reader, None)
+            info['rows'] = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        yield prepare_shopping_frame(chunk)
+
+def stream_shopping_data(file_path, chunksize=100_000, distinct='exact', hll_precision=14, sections=None):
+    aggregates = ShoppingAggregates(distinct, hll_precision, sections)
+    for chunk in read_shopping_chunks(file_path, chunksize, section_columns(sections)):
+        aggregates.update(chunk)
+    return aggregates
+
+def top_k_groups(file_path, by, k=10, metric='sales', largest=True, chunksize=None, groups_span_chunks=True):
+    # Ranks every value of `by` (customer_id, invoice_no, shopping_mall, ...) reading only the columns it needs
+    ranking = TopK(by, metric, k, largest, groups_span_chunks)
+    columns = [name for name in SHOPPING_DTYPES if name in ranking.columns]
+    chunks = read_shopping_chunks(file_path, chunksize, columns) if chunksize else [load_shopping_csv(file_path, columns)]
+    for chunk in chunks:
+        with stage("Top-K Ranking", len(chunk)):
+            ranking.update(chunk)
+    return ranking.result()
+
+
+# Parallel aggregation over many files / byte-range shards
+
+def resolve_shopping_files(file_paths):
+    if isinstance(file_paths, (str, os.PathLike)):
+        file_paths = [file_paths]
+
+    resolved = []
+    for path in file_paths:
+        path = os.fspath(path)
+        if glob.has_magic(path):
+            matches = sorted(glob.glob(path))
+            if not matches:
+                raise FileNotFoundError(f"No files match pattern: {path}")
+            resolved.extend(matches)
+        else:
+            resolved.append(path)
+    return resolved
+
+def plan_shards(file_paths, shard_bytes=64 * 1024 * 1024):
+    shards = []
+    for path in file_paths:
+        file_size = os.path.getsize(path)
+        with open(path, 'rb') as f:
+            header = f.readline()
+            start = f.tell()
+
+            # Cut every shard_bytes, then slide each cut to the start of the next line
+            while start < file_size:
+                f.seek(min(start + shard_bytes, file_size))
+                if f.tell() < file_size:
+                    f.readline()
+                end = f.tell()
+                shards.append((path, header, start, end))
+                start = end
+    return shards
+
+def aggregate_shard(shard, chunksize=100_000, distinct='exact', hll_precision=14, sections=None):
+    path, header, start, end = shard
+    with open(path, 'rb') as f:
+        f.seek(start)
+        body = f.read(end - start)
+
+    aggregates = ShoppingAggregates(distinct, hll_precision, sections)
+    for chunk in read_shopping_chunks(io.BytesIO(header + body), chunksize, section_columns(sections)):
+        aggregates.update(chunk)
+    return aggregates
+
+def parallel_shopping_aggregates(file_paths, workers=None, shard_bytes=64 * 1024 * 1024, chunksize=100_000,
+                                 distinct='exact', hll_precision=14, sections=None):
+    shards = plan_shards(resolve_shopping_files(file_paths), shard_bytes)
+    aggregates = ShoppingAggregates(distinct, hll_precision, sections)
+
+    if workers == 1 or len(shards) <= 1:
+        for shard in shards:
+            aggregates.merge(aggregate_shard(shard, chunksize, distinct, hll_precision, sections))
+        return aggregates
+
+    # Merge in shard order so first-seen group order matches a single-process run
+    count = len(shards)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for partial in pool.map(aggregate_shard, shards, [chunksize] * count,
+                                [distinct] * count, [hll_precision] * count, [sections] * count):
+            aggregates.merge(partial)
+    return aggregates
+
+
+# Incremental re-analysis of append-only CSVs
+
+STATE_VERSION = 5
+ANCHOR_BYTES = 4096
+
+def read_anchor(f, offset):
+    # Fingerprint of the header and the bytes just before offset, to spot rewritten files
+    digest = hashlib.blake2b(digest_size=16)
+    f.seek(0)
+    digest.update(f.readline())
+    f.seek(max(offset - ANCHOR_BYTES, 0))
+    digest.update(f.read(min(offset, ANCHOR_BYTES)))
+    return digest.hexdigest()
+
+def same_distinct(aggregates, distinct, hll_precision):
+    if aggregates.distinct != distinct:
+        return False
+    return distinct == 'exact' or aggregates.customers.precision == hll_precision
+
+def load_incremental_state(state_path, file_path):
+    # A state pickled by other code (e.g. classes saved from __main__) is rebuilt, not an error
+    try:
+        with open(state_path, 'rb') as f:
+            state = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+
+    if state.get('version') != STATE_VERSION or state.get('path') != os.path.abspath(file_path):
+        return None
+    if state['offset'] > os.path.getsize(file_path):
+        return None
+    with open(file_path, 'rb') as f:
+        if read_anchor(f, state['offset']) != state['anchor']:
+            return None
+    return state
+
+def save_incremental_state(state_path, file_path, aggregates, offset):
+    with open(file_path, 'rb') as f:
+        anchor = read_anchor(f, offset)
+
+    state = {
+        'version': STATE_VERSION,
+        'path': os.path.abspath(file_path),
+        'offset': offset,
+        'anchor': anchor,
+        'aggregates': aggregates
     }
-    
-    df_csv = pd.read_csv(file_path, dtype=dtypes)
-    print(f"Successfully loaded {len(df_csv):,} rows\n")
-    
-    # Pre-calculate values
-    df_csv['sales'] = df_csv.eval('quantity * price')
-    total_rows = len(df_csv)
-    total_revenue = df_csv['sales'].sum()
-    
-    # Task 2 & 3: Population count AND total sales by gender
-    print_section_header("Population Count by Gender")
-    
-    gender_stats = df_csv.groupby('gender', sort=False, observed=True).agg({
-        'customer_id': 'size',
-        'sales': 'sum'
-    })
-    gender_stats.columns = ['Count', 'Total Sales']
-    
-    gender_stats['Count %'] = (gender_stats['Count'] / total_rows * 100).round(2)
-    gender_stats['Sales %'] = (gender_stats['Total Sales'] / total_revenue * 100).round(2)
-    
-    count_summary = gender_stats[['Count', 'Count %']]
-    count_summary.columns = ['Count', 'Percentage']
-    
-    print_formatted_dataframe(count_summary, {
-        'Count': lambda x: f"{x:,}",
-        'Percentage': lambda x: f"{x:.2f}%"
-    })
-    print(f"\nTotal: {total_rows:,}")
-    
-    # Task 3: Display sales summary
-    print_section_header("Total Sales by Gender")
-    
-    sales_summary = gender_stats[['Total Sales', 'Sales %']]
-    sales_summary.columns = ['Total Sales', 'Percentage']
-    
-    print_formatted_dataframe(sales_summary, {
-        'Total Sales': lambda x: f"${x:,.2f}",
-        'Percentage': lambda x: f"{x:.2f}%"
-    })
-    print(f"\nGrand Total: ${total_revenue:,.2f}")
-    
-    # Task 4: Find most used payment method
-    print_section_header("Payment Method Usage")
-    
-    payment_counts = df_csv['payment_method'].value_counts()
-    payment_summary = create_count_summary(payment_counts, total_rows)
-    
-    print_formatted_dataframe(payment_summary, {
-        'Count': lambda x: f"{x:,}",
-        'Percentage': lambda x: f"{x:.2f}%"
-    })
-    print(f"\nMost used payment method: {payment_counts.idxmax()} ({payment_counts.max():,} transactions)")
-    
-    # Task 5: Find day with the most sales
-    print_section_header("Day with Most Sales")
-    
-    sales_by_date = df_csv.groupby('invoice_date', sort=False)['sales'].sum()
-    top_days = sales_by_date.nlargest(7)
-    
-    print("\nTop 7 days by sales:")
-    for i, (date, sales) in enumerate(top_days.items(), 1):
-        print(f"{i:2d}. {date}: ${sales:,.2f}")
-    
-    day_with_most_sales = top_days.idxmax()
-    max_sales = top_days.max()
-    print(f"\nDay with most sales: {day_with_most_sales} (${max_sales:,.2f})")
-    
-    print_section_header("Additional Statistics")
-    
-    stats = df_csv[['sales', 'quantity', 'price', 'customer_id']].agg({
-        'sales': 'mean',
-        'quantity': 'mean',
-        'price': 'mean',
-        'customer_id': 'nunique'
-    })
-    
-    print(f"Total transactions: {total_rows:,}")
-    print(f"Total revenue: ${total_revenue:,.2f}")
-    print(f"Average transaction value: ${stats['sales']:,.2f}")
-    print(f"Number of unique customers: {stats['customer_id']:,}")
-    print(f"Average items per transaction: {stats['quantity']:.2f}")
-    print(f"Average price per item: ${stats['price']:,.2f}")
-    
-    return df_csv
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, state_path)
+
+def incremental_shopping_aggregates(file_path, state_path, chunksize=100_000, distinct='exact', hll_precision=14):
+    # Saved aggregates counted customers some other way cannot take the new rows; start over
+    state = load_incremental_state(state_path, file_path)
+    if state is not None and not same_distinct(state['aggregates'], distinct, hll_precision):
+        state = None
+
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        if state is None:
+            aggregates, offset = ShoppingAggregates(distinct, hll_precision), f.tell()
+        else:
+            aggregates, offset = state['aggregates'], state['offset']
+
+        # Only take complete lines; a row still being written is picked up next run
+        end = f.seek(0, os.SEEK_END)
+        while end > offset:
+            f.seek(max(end - ANCHOR_BYTES, offset))
+            block = f.read(end - f.tell())
+            newline = block.rfind(b'\n')
+            if newline >= 0:
+                end -= len(block) - newline - 1
+                break
+            end -= len(block)
+
+    if end > offset:
+        aggregates.merge(aggregate_shard((file_path, header, offset, end), chunksize, distinct, hll_precision))
+    save_incremental_state(state_path, file_path, aggregates, end)
+    return aggregates
+
+
+def run_shopping_analysis(file_path='customer_shopping_data.csv', chunksize=None, workers=None,
+                          cache_dir=None, cache_max_bytes=CACHE_MAX_BYTES, state_path=None,
+                          distinct='exact', hll_precision=14, sections=None):
+    multi_file = not isinstance(file_path, (str, os.PathLike)) or glob.has_magic(os.fspath(file_path))
+
+    # The column cache holds one whole parsed file, which only the in-memory mode reads
+    if cache_dir and (state_path or chunksize or workers or multi_file):
+        raise ValueError("cache_dir only applies to a single file read in memory, "
+                         "not with chunksize, workers, state_path or several files")
+
+    # Incremental mode: resume from the saved aggregates and only parse rows appended since.
+    # The saved state always covers every section so later runs can ask for any of them
+    if state_path:
+        return incremental_shopping_aggregates(file_path, state_path, chunksize or 100_000,
+                                               distinct, hll_precision)
+
+    # Streaming mode: fold the CSV in chunk by chunk so peak memory stays bounded
+    if chunksize or workers or multi_file:
+        if workers or multi_file:
+            aggregates = parallel_shopping_aggregates(file_path, workers, chunksize=chunksize or 100_000,
+                                                      distinct=distinct, hll_precision=hll_precision,
+                                                      sections=sections)
+        else:
+            aggregates = stream_shopping_data(file_path, chunksize, distinct, hll_precision, sections)
+        return aggregates
+
+    # Task 1: Read CSV with explicit datatypes (or the parsed columns cached from a previous run)
+    df_csv = load_shopping_frame(file_path, sections, cache_dir, cache_max_bytes)
+
+    # Tasks 2-5: every requested metric comes out of one fused pass over the columns
+    aggregates = ShoppingAggregates(distinct, hll_precision, sections)
+    aggregates.update(df_csv)
+    return aggregates
+
+def load_shopping_frame(file_path='customer_shopping_data.csv', sections=None, cache_dir=None,
+                        cache_max_bytes=CACHE_MAX_BYTES):
+    # The typed, ID-encoded frame the in-memory analysis runs over, for callers that want the rows
+    columns = section_columns(sections)
+    if cache_dir:
+        return read_csv_cached(file_path, load_shopping_csv, cache_dir, cache_max_bytes, columns=columns)
+    return load_shopping_csv(file_path, columns)
+
+def shopping_report(file_path='customer_shopping_data.csv', top_n=7, sections=None, **options):
+    aggregates = run_shopping_analysis(file_path, sections=sections, **options)
+    return build_report(aggregates, top_n, sections)
+
+def analyze_shopping_data(file_path='customer_shopping_data.csv', output='text', top_n=7, sections=None, **options):
+    # Always the ShoppingReport, whichever mode ran; run_shopping_analysis gives the aggregates and
+    # load_shopping_frame the parsed rows
+    report = shopping_report(file_path, top_n, sections, **options)
+    if output:
+        print(report.render(output, sections))
+    return report
+
+def main(argv=None):
+    # One command line for both entry points, so their flags cannot drift apart
+    return cli_main(argv)
 
 if __name__ == "__main__":
-    df_csv = analyze_shopping_data('customer_shopping_data.csv')
-    
-    print("\n" + "=" * 50)
\ No newline at end of file
+    # Run through the importable module, so pickled state refers to Asgn_1.ShoppingAggregates
+    from Asgn_1 import main
+    main()
@@ -0,0 +1,296 @@
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import numpy as np
+
+from Asgn_1 import (
+    SHOPPING_DTYPES,
+    ShoppingAggregates,
+    encode_shopping_ids,
+    load_shopping_csv,
+    load_shopping_frame,
+    parse_invoice_dates,
+    print_section_header
+)
+from instrumentation import peak_rss_bytes
+from report import build_report
+
+# Cardinalities and mixes modelled on the original customer_shopping_data.csv
+CATEGORY_PRICES = {
+    'Clothing': 300.08, 'Shoes': 600.17, 'Books': 15.15, 'Cosmetics': 40.66,
+    'Food & Beverage': 5.23, 'Toys': 35.84, 'Technology': 1050.0, 'Souvenir': 11.73
+}
+CATEGORY_WEIGHTS = [0.347, 0.101, 0.050, 0.152, 0.149, 0.101, 0.050, 0.050]
+GENDERS = ['Female', 'Male']
+GENDER_WEIGHTS = [0.598, 0.402]
+PAYMENT_METHODS = ['Cash', 'Credit Card', 'Debit Card']
+PAYMENT_WEIGHTS = [0.447, 0.351, 0.202]
+SHOPPING_MALLS = [
+    'Mall of Istanbul', 'Kanyon', 'Metrocity', 'Metropol AVM', 'Istinye Park',
+    'Zorlu Center', 'Cevahir AVM', 'Viaport Outlet', 'Emaar Square Mall', 'Forum Istanbul'
+]
+MALL_WEIGHTS = [0.200, 0.199, 0.151, 0.102, 0.098, 0.051, 0.050, 0.050, 0.050, 0.049]
+FIRST_DAY = np.datetime64('2021-01-01')
+DAY_COUNT = 797
+
+# Helper Functions
+
+def time_call(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def prefixed_ids(prefix, numbers, width):
+    return prefix + pd.Series(numbers).astype(str).str.zfill(width)
+
+
+# Synthetic data generator
+
+def generate_shopping_chunk(rng, start, rows, id_width):
+    categories = rng.choice(list(CATEGORY_PRICES), size=rows, p=CATEGORY_WEIGHTS)
+    quantity = rng.integers(1, 6, size=rows)
+    unit_price = pd.Series(categories).map(CATEGORY_PRICES).to_numpy()
+
+    day_strings = pd.Series(FIRST_DAY + np.arange(DAY_COUNT)).dt.strftime('%-d/%-m/%Y').to_numpy()
+    customers = rng.integers(0, 10 ** id_width, size=rows)
+
+    return pd.DataFrame({
+        'invoice_no': prefixed_ids('I', np.arange(start, start + rows), id_width),
+        'customer_id': prefixed_ids('C', customers, id_width),
+        'gender': rng.choice(GENDERS, size=rows, p=GENDER_WEIGHTS),
+        'age': rng.integers(18, 70, size=rows),
+        'category': categories,
+        'quantity': quantity,
+        'price': np.round(unit_price * quantity, 2),
+        'payment_method': rng.choice(PAYMENT_METHODS, size=rows, p=PAYMENT_WEIGHTS),
+        'invoice_date': day_strings[rng.integers(0, DAY_COUNT, size=rows)],
+        'shopping_mall': rng.choice(SHOPPING_MALLS, size=rows, p=MALL_WEIGHTS)
+    })
+
+def generate_shopping_csv(file_path, rows, seed=0, chunk_rows=1_000_000):
+    rng = np.random.default_rng(seed)
+    id_width = max(6, len(str(rows - 1)))
+
+    # Written in chunks so 1e8-row files never have to be built in memory
+    with open(file_path, 'w', newline='') as f:
+        for start in range(0, rows, chunk_rows):
+            chunk = generate_shopping_chunk(rng, start, min(chunk_rows, rows - start), id_width)
+            chunk.to_csv(f, header=start == 0, index=False)
+    return file_path
+
+
+# Per-stage timing of a full analyze run
+
+class StageTimer:
+    def __init__(self):
+        self.stages = []
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.stages.append({
+            'stage': name,
+            'seconds': time.perf_counter() - start,
+            'peak_rss_mb': peak_rss_bytes() / 1024 ** 2
+        })
+
+    def results(self, rows):
+        for stage in self.stages:
+            stage['rows_per_sec'] = rows / stage['seconds'] if stage['seconds'] > 0 else None
+        return self.stages
+
+def benchmark_stages(file_path):
+    timer = StageTimer()
+    with timer.stage('load'):
+        df_csv = pd.read_csv(file_path, dtype=SHOPPING_DTYPES)
+
+    aggregates = ShoppingAggregates()
+    with timer.stage('parse_dates'):
+        df_csv['invoice_date'] = parse_invoice_dates(df_csv['invoice_date'])
+    with timer.stage('encode_ids'):
+        encode_shopping_ids(df_csv)
+    with timer.stage('sales_derivation'):
+        sales = aggregates.update_totals(df_csv)
+    with timer.stage('gender'):
+        aggregates.update_gender(df_csv, sales)
+    with timer.stage('payment_method'):
+        aggregates.update_payment(df_csv, sales)
+    with timer.stage('day_with_most_sales'):
+        aggregates.update_dates(df_csv, sales)
+    with timer.stage('shopping_mall'):
+        aggregates.update_malls(df_csv, sales)
+    with timer.stage('additional_statistics'):
+        aggregates.update_customers(df_csv)
+        aggregates.additional_stats()
+    with timer.stage('formatting'):
+        build_report(aggregates).render('text')
+
+    return {
+        'rows': len(df_csv),
+        'file_bytes': os.path.getsize(file_path),
+        'total_seconds': sum(stage['seconds'] for stage in timer.stages),
+        'peak_rss_mb': peak_rss_bytes() / 1024 ** 2,
+        'stages': timer.results(len(df_csv))
+    }
+
+def benchmark_size(rows, data_dir, seed=0, keep=False):
+    file_path = os.path.join(data_dir, f"customer_shopping_data_{rows}.csv")
+    if not os.path.exists(file_path):
+        generate_shopping_csv(file_path, rows, seed)
+
+    try:
+        result = benchmark_stages(file_path)
+    finally:
+        if not keep:
+            os.remove(file_path)
+
+    result['rows_per_sec'] = result['rows'] / result['total_seconds']
+    return result
+
+def run_benchmark_suite(sizes, data_dir=None, seed=0, keep=False):
+    data_dir = data_dir or tempfile.mkdtemp(prefix='shopping_bench_')
+    os.makedirs(data_dir, exist_ok=True)
+
+    # Each size runs in a fresh process so peak RSS is not inherited from the previous one
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for rows in sizes:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results.append(pool.submit(benchmark_size, rows, data_dir, seed, keep).result())
+    return {
+        'python': sys.version.split()[0],
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'results': results
+    }
+
+
+# The original multi-pass computation, kept as the baseline for comparison. It runs on the frame
+# exactly as the original pd.read_csv produced it: string dates and IDs, no encoding
+
+def multi_pass_tables(df_csv):
+    df_csv = df_csv.copy(deep=False)
+    df_csv['sales'] = df_csv.eval('quantity * price')
+    total_revenue = df_csv['sales'].sum()
+
+    gender_stats = df_csv.groupby('gender', sort=False, observed=True).agg({
+        'customer_id': 'size',
+        'sales': 'sum'
+    })
+    payment_counts = df_csv['payment_method'].value_counts()
+    sales_by_date = df_csv.groupby('invoice_date', sort=False)['sales'].sum()
+    stats = df_csv[['sales', 'quantity', 'price', 'customer_id']].agg({
+        'sales': 'mean',
+        'quantity': 'mean',
+        'price': 'mean',
+        'customer_id': 'nunique'
+    })
+    return total_revenue, gender_stats, payment_counts, sales_by_date, stats
+
+def fused_tables(df_csv):
+    aggregates = ShoppingAggregates()
+    aggregates.update(df_csv)
+    return (
+        aggregates.total_revenue,
+        aggregates.gender_stats(),
+        aggregates.payment_series(),
+        aggregates.date_series(),
+        aggregates.additional_stats()
+    )
+
+
+def baseline_pipeline(file_path):
+    return multi_pass_tables(pd.read_csv(file_path, dtype=SHOPPING_DTYPES))
+
+def fused_pipeline(file_path):
+    # What the in-memory analysis reads now: only the report's columns, typed, dates parsed, IDs encoded
+    return fused_tables(load_shopping_frame(file_path))
+
+
+def benchmark_aggregation(file_path, repeat=5):
+    # Read plus aggregation for both, so the speedup is against what the original code ran
+    rows = sum(1 for _ in open(file_path, 'rb')) - 1
+
+    multi_pass = time_call(baseline_pipeline, file_path, repeat=repeat)
+    fused = time_call(fused_pipeline, file_path, repeat=repeat)
+
+    print_section_header("Aggregation Benchmark")
+    print(f"Rows: {rows:,} (read_csv plus aggregation)")
+    print(f"Original read + multi-pass groupby/agg: {multi_pass * 1000:8.2f} ms ({rows / multi_pass:,.0f} rows/s)")
+    print(f"Typed read + fused bincount kernel:     {fused * 1000:8.2f} ms ({rows / fused:,.0f} rows/s)")
+    print(f"Speedup: {multi_pass / fused:.2f}x")
+
+    return {'rows': rows, 'multi_pass_seconds': multi_pass, 'fused_seconds': fused}
+
+
+# Process start-to-exit time of the command line entry points
+
+def time_command(command, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def benchmark_startup(file_path, repeat=5):
+    here = os.path.dirname(os.path.abspath(__file__))
+    cli = os.path.join(here, 'shopping_cli.py')
+    commands = {
+        'cli_help': [sys.executable, cli, '--help'],
+        'cli_csv_engine': [sys.executable, cli, file_path, '--engine', 'csv'],
+        'cli_pandas_engine': [sys.executable, cli, file_path, '--engine', 'pandas'],
+        'asgn_1': [sys.executable, os.path.join(here, 'Asgn_1.py'), file_path]
+    }
+    results = {name: time_command(command, repeat) for name, command in commands.items()}
+
+    print_section_header("Startup Benchmark")
+    print(f"File: {file_path} ({os.path.getsize(file_path):,} bytes)")
+    for name, seconds in results.items():
+        print(f"{name:<18} {seconds * 1000:8.1f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the shopping data analysis")
+    parser.add_argument('--rows', type=float, nargs='+', default=[1e5, 1e6],
+                        help="synthetic dataset sizes to benchmark (e.g. 1e5 1e6 1e7)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', help="where to write the generated CSVs (default: a temp dir)")
+    parser.add_argument('--keep', action='store_true', help="keep the generated CSVs")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--compare', metavar='CSV',
+                        help="compare the fused kernel against the multi-pass baseline on CSV and exit")
+    parser.add_argument('--startup', metavar='CSV',
+                        help="time process startup of the CLI engines and Asgn_1.py on CSV and exit")
+    args = parser.parse_args(argv)
+
+    if args.startup:
+        benchmark_startup(args.startup)
+        return
+    if args.compare:
+        benchmark_aggregation(args.compare)
+        return
+
+    results = run_benchmark_suite([int(rows) for rows in args.rows], args.data_dir, args.seed, args.keep)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,5 @@
+# Column cache defaults; stdlib only so the CLI can offer them without importing pandas
+
+# Where the cache goes when --cache-dir is given without a directory (ignored by git)
+CACHE_DIR = '.shopping_cache'
+CACHE_MAX_BYTES = 1024 ** 3
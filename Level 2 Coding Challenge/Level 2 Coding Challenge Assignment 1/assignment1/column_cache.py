@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import shutil
+
+import pandas as pd
+import numpy as np
+
+from cache_defaults import CACHE_DIR, CACHE_MAX_BYTES
+
+CACHE_VERSION = 3
+SAMPLE_BLOCK = 1024 * 1024
+SAMPLE_COUNT = 8
+
+# Helper Functions
+
+def file_fingerprint(file_path, full_hash=False):
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+
+    with open(file_path, 'rb') as f:
+        if full_hash or stat.st_size <= SAMPLE_BLOCK * SAMPLE_COUNT:
+            for block in iter(lambda: f.read(SAMPLE_BLOCK), b''):
+                digest.update(block)
+        else:
+            # Hash evenly spaced blocks (always including the head and tail) for big files
+            step = (stat.st_size - SAMPLE_BLOCK) // (SAMPLE_COUNT - 1)
+            for i in range(SAMPLE_COUNT):
+                f.seek(i * step)
+                digest.update(f.read(SAMPLE_BLOCK))
+
+    return {
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'content_hash': digest.hexdigest(),
+        'full_hash': full_hash
+    }
+
+def cache_entry_dir(cache_dir, file_path):
+    key = hashlib.sha1(os.path.abspath(file_path).encode()).hexdigest()
+    return os.path.join(cache_dir, key)
+
+def directory_size(path):
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+def read_manifest(entry_dir):
+    try:
+        with open(os.path.join(entry_dir, 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Writing and reading cached columns
+
+def save_columns(df_csv, file_path, cache_dir, fingerprint=None):
+    entry_dir = cache_entry_dir(cache_dir, file_path)
+    tmp_dir = entry_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = {}
+    for name in df_csv.columns:
+        column = df_csv[name]
+        spec = {'dtype': str(column.dtype)}
+
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            spec['categories'] = column.cat.categories.tolist()
+            values = column.cat.codes.to_numpy()
+        elif pd.api.types.is_string_dtype(column.dtype):
+            mask = column.isna().to_numpy()
+            if mask.any():
+                np.save(os.path.join(tmp_dir, f"{name}.mask.npy"), mask)
+                spec['has_mask'] = True
+            values = column.fillna('').to_numpy(dtype=str)
+        else:
+            values = column.to_numpy()
+
+        np.save(os.path.join(tmp_dir, f"{name}.npy"), values)
+        columns[name] = spec
+
+    manifest = {
+        'version': CACHE_VERSION,
+        'fingerprint': fingerprint or file_fingerprint(file_path),
+        'rows': len(df_csv),
+        'columns': columns,
+        'attrs': df_csv.attrs
+    }
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f)
+
+    # Swap the finished entry in so readers never see a half-written cache
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+    return entry_dir
+
+def load_columns(file_path, cache_dir, full_hash=False, columns=None):
+    entry_dir = cache_entry_dir(cache_dir, file_path)
+    manifest = read_manifest(entry_dir)
+    if manifest is None or manifest.get('version') != CACHE_VERSION:
+        return None
+
+    cached = manifest['fingerprint']
+    stat = os.stat(file_path)
+    if cached['size'] != stat.st_size or cached['mtime_ns'] != stat.st_mtime_ns:
+        return None
+    if file_fingerprint(file_path, full_hash or cached['full_hash'])['content_hash'] != cached['content_hash']:
+        return None
+
+    data = {}
+    for name, spec in manifest['columns'].items():
+        if columns is not None and name not in columns:
+            continue
+        values = np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode='r')
+
+        if 'categories' in spec:
+            data[name] = pd.Categorical.from_codes(values, spec['categories'])
+        elif spec['dtype'] in ('string', 'str'):
+            column = pd.array(values, dtype='string')
+            if spec.get('has_mask'):
+                column[np.load(os.path.join(entry_dir, f"{name}.mask.npy"))] = pd.NA
+            data[name] = column
+        else:
+            data[name] = values
+
+    # Touch the manifest so eviction treats this entry as recently used
+    os.utime(os.path.join(entry_dir, 'manifest.json'))
+    df_csv = pd.DataFrame(data, copy=False)
+    df_csv.attrs.update(manifest.get('attrs', {}))
+    return df_csv
+
+def evict_cache(cache_dir, max_bytes):
+    if not os.path.isdir(cache_dir):
+        return []
+
+    entries = []
+    for name in os.listdir(cache_dir):
+        entry_dir = os.path.join(cache_dir, name)
+        manifest_path = os.path.join(entry_dir, 'manifest.json')
+        if os.path.isdir(entry_dir) and os.path.exists(manifest_path):
+            entries.append((os.path.getmtime(manifest_path), directory_size(entry_dir), entry_dir))
+
+    # Drop least recently used entries until the cache fits the disk budget
+    entries.sort()
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    for _, size, entry_dir in entries:
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        total -= size
+        evicted.append(entry_dir)
+    return evicted
+
+def read_csv_cached(file_path, reader, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, full_hash=False, columns=None):
+    # Hits map only the requested columns; a miss still caches every column so later runs can ask for others
+    df_csv = load_columns(file_path, cache_dir, full_hash, columns)
+    if df_csv is not None:
+        return df_csv
+
+    fingerprint = file_fingerprint(file_path, full_hash)
+    df_csv = reader(file_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    save_columns(df_csv, file_path, cache_dir, fingerprint)
+    evict_cache(cache_dir, max_bytes)
+    return df_csv if columns is None else df_csv[list(columns)]
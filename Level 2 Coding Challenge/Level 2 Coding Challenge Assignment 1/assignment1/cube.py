@@ -0,0 +1,261 @@
+import argparse
+import json
+import math
+
+import pandas as pd
+import numpy as np
+
+from Asgn_1 import day_ordinals, load_shopping_csv
+from instrumentation import stage
+
+CUBE_DIMENSIONS = ('gender', 'category', 'payment_method', 'shopping_mall', 'invoice_date')
+CUBE_MEASURES = ('count', 'quantity', 'sales')
+
+# Helper Functions
+
+def as_label_list(selection):
+    return list(selection) if isinstance(selection, (list, tuple, set, pd.Index)) else [selection]
+
+def day_number(value):
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype('int64'))
+
+def period_keys(days, freq):
+    # Same bucketing as rollup_sales: weeks start on Monday, months on the 1st
+    if freq == 'day':
+        return days
+    if freq == 'week':
+        return days - (days + 3) % 7
+    if freq == 'month':
+        return days.astype('datetime64[D]').astype('datetime64[M]').astype('datetime64[D]').astype('int64')
+    raise ValueError(f"Unknown rollup frequency: {freq}")
+
+
+# Dense count / quantity / sales cube over the categorical columns and days
+
+class ShoppingCube:
+    def __init__(self, labels, first_day, count, quantity, sales, dropped_rows=0):
+        self.labels = labels
+        self.first_day = first_day
+        self.count = count
+        self.quantity = quantity
+        self.sales = sales
+        self.dropped_rows = dropped_rows
+        self.cached_day_totals = None
+        # Plain dict lookups keep label -> position resolution off the pandas Index machinery
+        self.label_positions = {
+            dimension: {label: position for position, label in enumerate(values)} for dimension, values in labels.items()
+        }
+
+    @property
+    def shape(self):
+        return self.count.shape
+
+    def measures(self):
+        return {'count': self.count, 'quantity': self.quantity, 'sales': self.sales}
+
+    def day_totals(self):
+        # The cube summed over days is a few hundred cells, so queries that ignore dates never touch the day axis
+        if self.cached_day_totals is None:
+            self.cached_day_totals = {name: values.sum(axis=-1) for name, values in self.measures().items()}
+        return self.cached_day_totals
+
+    def view(self):
+        return CubeView(self)
+
+    def slice(self, **selections):
+        return self.view().slice(**selections)
+
+    def rollup(self, by=(), freq='day'):
+        return self.view().rollup(by, freq)
+
+    def totals(self):
+        return self.view().totals()
+
+    def save(self, file_path):
+        header = {
+            'dimensions': CUBE_DIMENSIONS,
+            'labels': self.labels,
+            'first_day': self.first_day,
+            'dropped_rows': self.dropped_rows
+        }
+        # Counts are stored in the narrowest integer type that holds them; the arrays are mostly zeros and compress well
+        count_dtype = np.min_scalar_type(int(self.count.max(initial=0)))
+        quantity_dtype = np.min_scalar_type(int(self.quantity.max(initial=0)))
+        with open(file_path, 'wb') as f:
+            np.savez_compressed(
+                f,
+                header=np.array(json.dumps(header)),
+                count=self.count.astype(count_dtype),
+                quantity=self.quantity.astype(quantity_dtype),
+                sales=self.sales
+            )
+        return file_path
+
+
+# A slice of the cube: selected positions per dimension, only materialized when a query needs the cells
+
+class CubeView:
+    def __init__(self, cube, positions=None, days=None):
+        self.cube = cube
+        self.positions = positions or {
+            dimension: np.arange(size) for dimension, size in zip(CUBE_DIMENSIONS[:-1], cube.shape)
+        }
+        self.days = days or (0, cube.shape[-1])
+
+    def axis_labels(self, dimension):
+        if dimension == 'invoice_date':
+            days = np.arange(*self.days) + self.cube.first_day
+            return pd.DatetimeIndex(days.astype('datetime64[D]'), name='invoice_date')
+        return pd.Index(self.cube.labels[dimension], name=dimension).take(self.positions[dimension])
+
+    def slice(self, **selections):
+        # Dice by label (one or many per dimension); invoice_date takes a date or a (start, end) range
+        positions = dict(self.positions)
+        low, high = self.days
+
+        for dimension, selection in selections.items():
+            if dimension not in CUBE_DIMENSIONS:
+                raise ValueError(f"Unknown cube dimension: {dimension}")
+
+            if dimension == 'invoice_date':
+                start, end = selection if isinstance(selection, tuple) else (selection, selection)
+                first_day = self.cube.first_day
+                if start is not None:
+                    low = max(low, day_number(start) - first_day)
+                if end is not None:
+                    high = min(high, day_number(end) - first_day + 1)
+                high = max(high, low)
+            else:
+                wanted = as_label_list(selection)
+                lookup = self.cube.label_positions[dimension]
+                missing = [label for label in wanted if label not in lookup]
+                if missing:
+                    raise KeyError(f"Unknown {dimension} value(s): {missing}")
+                found = np.array([lookup[label] for label in wanted], dtype='int64')
+                # Labels already sliced away stay out, so slicing twice narrows like a single combined slice
+                positions[dimension] = found[np.isin(found, positions[dimension])]
+
+        return CubeView(self.cube, positions, (low, high))
+
+    def measures(self):
+        low, high = self.days
+        cells = np.ix_(*self.positions.values())
+        return {name: values[..., low:high][cells] for name, values in self.cube.measures().items()}
+
+    def day_totals(self):
+        if self.days != (0, self.cube.shape[-1]):
+            return {name: values.sum(axis=-1) for name, values in self.measures().items()}
+        cells = np.ix_(*self.positions.values())
+        return {name: values[cells] for name, values in self.cube.day_totals().items()}
+
+    def rollup(self, by=(), freq='day'):
+        by = [by] if isinstance(by, str) else list(by)
+        unknown = [dimension for dimension in by if dimension not in CUBE_DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown cube dimension(s): {unknown}")
+
+        # Sum away every axis that is not kept, then reorder the kept ones to match `by`
+        dated = 'invoice_date' in by
+        dimensions = CUBE_DIMENSIONS if dated else CUBE_DIMENSIONS[:-1]
+        source = self.measures() if dated else self.day_totals()
+        drop = tuple(axis for axis, dimension in enumerate(dimensions) if dimension not in by)
+        kept = [dimension for dimension in dimensions if dimension in by]
+        order = [kept.index(dimension) for dimension in by]
+        arrays = {name: values.sum(axis=drop).transpose(order) for name, values in source.items()}
+
+        indexes = [self.axis_labels(dimension) for dimension in by]
+        if dated and freq != 'day':
+            axis = by.index('invoice_date')
+            keys = period_keys(indexes[axis].to_numpy().astype('datetime64[D]').astype('int64'), freq)
+            periods, inverse = np.unique(keys, return_inverse=True)
+            for name, values in arrays.items():
+                rolled = np.zeros(values.shape[:axis] + (len(periods),) + values.shape[axis + 1:], dtype=values.dtype)
+                np.add.at(rolled, (slice(None),) * axis + (inverse,), values)
+                arrays[name] = rolled
+            indexes[axis] = pd.DatetimeIndex(periods.astype('datetime64[D]'), name=freq)
+
+        if not by:
+            return pd.Series({name: values.item() for name, values in arrays.items()}, dtype=object)
+
+        index = pd.MultiIndex.from_product(indexes) if len(indexes) > 1 else indexes[0]
+        table = pd.DataFrame({name: values.reshape(-1) for name, values in arrays.items()}, index=index)
+        return table[table['count'] > 0]
+
+    def totals(self):
+        day_totals = self.day_totals()
+        return {
+            'count': int(day_totals['count'].sum()),
+            'quantity': int(day_totals['quantity'].sum()),
+            'sales': float(day_totals['sales'].sum())
+        }
+
+
+def build_cube(df_csv):
+    rows = len(df_csv)
+    with stage("Cube: Build", rows):
+        codes = [df_csv[dimension].cat.codes.to_numpy().astype('int64') for dimension in CUBE_DIMENSIONS[:-1]]
+        labels = {dimension: df_csv[dimension].cat.categories.tolist() for dimension in CUBE_DIMENSIONS[:-1]}
+        days, valid = day_ordinals(df_csv['invoice_date'])
+        for column in codes:
+            valid &= column >= 0
+
+        first_day = int(days[valid].min()) if valid.any() else 0
+        day_count = int(days[valid].max()) - first_day + 1 if valid.any() else 0
+        shape = tuple(len(labels[dimension]) for dimension in CUBE_DIMENSIONS[:-1]) + (day_count,)
+
+        # Every row lands in one cell; three bincounts over the flat cell index fill the whole cube
+        cells = np.ravel_multi_index([column[valid] for column in codes] + [days[valid] - first_day], shape)
+        quantity = df_csv['quantity'].to_numpy(dtype='float64')[valid]
+        sales = quantity * df_csv['price'].to_numpy(dtype='float64')[valid]
+        size = math.prod(shape)
+
+        return ShoppingCube(
+            labels,
+            first_day,
+            np.bincount(cells, minlength=size).reshape(shape),
+            np.bincount(cells, weights=quantity, minlength=size).astype('int64').reshape(shape),
+            np.bincount(cells, weights=sales, minlength=size).reshape(shape),
+            dropped_rows=int(rows - valid.sum())
+        )
+
+def load_cube(file_path):
+    with np.load(file_path) as data:
+        header = json.loads(data['header'].item())
+        return ShoppingCube(
+            header['labels'],
+            header['first_day'],
+            data['count'].astype('int64'),
+            data['quantity'].astype('int64'),
+            data['sales'],
+            header['dropped_rows']
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a pre-aggregated shopping data cube")
+    parser.add_argument('cube_path', help="cube file (.npz) to query, or to write with --build")
+    parser.add_argument('--build', metavar='CSV', help="build the cube from this CSV and save it to cube_path")
+    parser.add_argument('--by', nargs='*', default=[], choices=CUBE_DIMENSIONS, help="dimensions to keep in the roll-up")
+    parser.add_argument('--freq', choices=['day', 'week', 'month'], default='day', help="roll invoice_date up to this period")
+    for dimension in CUBE_DIMENSIONS[:-1]:
+        parser.add_argument(f"--{dimension.replace('_', '-')}", dest=dimension, nargs='+', help=f"keep only these {dimension} values")
+    parser.add_argument('--start', help="first invoice date to include (YYYY-MM-DD)")
+    parser.add_argument('--end', help="last invoice date to include (YYYY-MM-DD)")
+    args = parser.parse_args(argv)
+
+    if args.build:
+        cube = build_cube(load_shopping_csv(args.build))
+        cube.save(args.cube_path)
+    else:
+        cube = load_cube(args.cube_path)
+
+    selections = {dimension: getattr(args, dimension) for dimension in CUBE_DIMENSIONS[:-1] if getattr(args, dimension)}
+    if args.start or args.end:
+        selections['invoice_date'] = (args.start, args.end)
+
+    result = cube.slice(**selections).rollup(args.by, args.freq)
+    print(result.to_string())
+    return result
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import math
+
+import pandas as pd
+import numpy as np
+
+# Helper Functions
+
+def bit_length_uint64(values):
+    # frexp is exact for 32-bit halves, so split the 64-bit words before taking exponents
+    high = (values >> np.uint64(32)).astype('float64')
+    low = (values & np.uint64(0xFFFFFFFF)).astype('float64')
+    return np.where(high > 0, np.frexp(high)[1] + 32, np.frexp(low)[1])
+
+
+# Mergeable distinct-count sketch
+
+class HyperLogLog:
+    def __init__(self, precision=14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"HyperLogLog precision must be between 4 and 18, got {precision}")
+
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype='uint8')
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add_values(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind not in 'iu':
+            values = values.astype(object)
+        if len(values) == 0:
+            return self
+
+        # hash_array uses a fixed key, so sketches built in different processes agree
+        hashes = pd.util.hash_array(values)
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype('int64')
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        rank = (suffix_bits - bit_length_uint64(suffix) + 1).astype('uint8')
+
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError(f"Cannot merge HyperLogLog sketches with precision {self.precision} and {other.precision}")
+
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / np.ldexp(1.0, -self.registers.astype('int64')).sum()
+
+        # Small cardinalities are better served by linear counting over the empty registers
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
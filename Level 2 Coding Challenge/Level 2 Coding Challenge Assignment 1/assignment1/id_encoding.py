@@ -0,0 +1,114 @@
+from functools import lru_cache
+from hashlib import blake2b
+
+import pandas as pd
+import numpy as np
+
+INT32_MAX = np.iinfo('int32').max
+ID_LETTERS = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# Helper Functions
+
+def detect_id_prefix(strings):
+    # Take the prefix/width from the first ID, then check every row against it
+    first = strings.dropna()
+    if first.empty:
+        return None, None
+
+    sample = str(first.iloc[0])
+    prefix_length = len(sample) - len(sample.lstrip(ID_LETTERS))
+    prefix, number = sample[:prefix_length], sample[prefix_length:]
+    if not number.isdigit() or len(number) > 18:
+        return None, None
+
+    spec = {'kind': 'prefix', 'prefix': prefix, 'width': len(number)}
+    fits, numbers = parse_prefix_ids(strings, spec)
+    if not fits.all():
+        return None, None
+    return spec, numbers
+
+def parse_prefix_ids(strings, spec):
+    prefix, width = spec['prefix'], spec['width']
+    length = len(prefix) + width
+    raw = strings.to_numpy(dtype=object, na_value='')
+
+    # View fixed-width unicode as code points; one spare column flags IDs that are too long
+    points = raw.astype(f'U{length + 1}').view('uint32').reshape(len(raw), length + 1)
+    digits = points[:, len(prefix):length].astype('int64') - ord('0')
+    fits = (points[:, length] == 0) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+    if prefix:
+        fits &= (points[:, :len(prefix)] == np.array([ord(c) for c in prefix], dtype='uint32')).all(axis=1)
+
+    numbers = digits @ (10 ** np.arange(width - 1, -1, -1, dtype='int64'))
+    return fits, np.where(fits, numbers, 0)
+
+@lru_cache(maxsize=None)
+def prefix_salt(prefix, width):
+    return np.uint64(int.from_bytes(blake2b(f'{prefix}:{width}'.encode(), digest_size=8).digest(), 'little'))
+
+def split_id(string):
+    # An ID's own prefix and digits, the same split detect_id_prefix makes
+    number = string.lstrip(ID_LETTERS)
+    if number.isascii() and number.isdigit() and len(number) <= 18:
+        return string[:len(string) - len(number)], number
+    return None, None
+
+def compact_ints(numbers):
+    return numbers.astype('int32') if len(numbers) and numbers.max() <= INT32_MAX else numbers
+
+
+# Encoding and decoding ID columns
+
+def encode_id_column(strings):
+    spec, numbers = detect_id_prefix(strings)
+    if spec is not None:
+        return pd.Series(compact_ints(numbers), index=strings.index, name=strings.name), spec
+
+    # Irregular IDs fall back to a dictionary encoding (integer codes into the distinct values)
+    return strings.astype('category'), {'kind': 'dictionary'}
+
+def decode_id_column(values, spec):
+    if spec is None or spec['kind'] == 'dictionary':
+        return values.astype('string')
+
+    numbers = values.astype('int64').astype(str).str.zfill(spec['width'])
+    return (spec['prefix'] + numbers).astype('string')
+
+def encode_shopping_ids(df_csv, columns=('invoice_no', 'customer_id')):
+    encodings = dict(df_csv.attrs.get('id_encodings', {}))
+    for name in columns:
+        if name in df_csv.columns and name not in encodings:
+            df_csv[name], encodings[name] = encode_id_column(df_csv[name])
+    df_csv.attrs['id_encodings'] = encodings
+    return df_csv
+
+def render_ids(df_csv, column):
+    return decode_id_column(df_csv[column], df_csv.attrs.get('id_encodings', {}).get(column))
+
+def canonical_id_keys(values, spec, target_spec):
+    # Keys that agree across chunks: ints when the ID fits target_spec, the original string otherwise
+    if spec is not None and spec == target_spec and spec['kind'] == 'prefix':
+        return values.to_numpy(dtype='int64'), np.empty(0, dtype=object)
+
+    strings = decode_id_column(values, spec).dropna()
+    if target_spec is None or target_spec['kind'] != 'prefix':
+        return np.empty(0, dtype='int64'), strings.to_numpy(dtype=object)
+
+    fits, numbers = parse_prefix_ids(strings, target_spec)
+    return numbers[fits], strings[~fits].to_numpy(dtype=object)
+
+def canonical_id_hashes(values, spec):
+    # One 64-bit key per distinct ID that depends only on the ID itself, never on how its chunk was
+    # encoded: prefix/width/number IDs are salted numbers, anything else a hash of the string
+    if spec is not None and spec['kind'] == 'prefix':
+        return values.to_numpy(dtype='uint64') ^ prefix_salt(spec['prefix'], spec['width'])
+
+    keys, irregular = [], []
+    for string in pd.unique(decode_id_column(values, spec).dropna()):
+        prefix, number = split_id(string)
+        if number is None:
+            irregular.append(string)
+        else:
+            keys.append(np.uint64(int(number)) ^ prefix_salt(prefix, len(number)))
+    hashed = pd.util.hash_array(np.array(irregular, dtype=object)) if irregular else np.empty(0, dtype='uint64')
+    return np.concatenate([np.array(keys, dtype='uint64'), hashed])
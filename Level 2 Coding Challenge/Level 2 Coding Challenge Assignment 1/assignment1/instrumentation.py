@@ -0,0 +1,136 @@
+import contextlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger('shopping.instrumentation')
+
+# Shared no-op returned by stage() when nothing is recording, so disabled runs pay one None check;
+# anything a caller writes into its info dict is simply discarded
+NO_STAGE = contextlib.nullcontext({})
+
+active_recorder = None
+
+# Helper Functions
+
+def peak_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == 'darwin' else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+# Recording per-stage wall time, CPU time, rows and allocations
+
+class StageRecorder:
+    def __init__(self, trace_allocations=False, callback=None):
+        self.trace_allocations = trace_allocations
+        self.callback = callback
+        self.events = []
+        self.origin = time.perf_counter()
+
+    def start(self):
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.owns_tracemalloc = True
+        else:
+            self.owns_tracemalloc = False
+
+    def stop(self):
+        if self.owns_tracemalloc:
+            tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def stage(self, name, rows=0):
+        if self.trace_allocations:
+            allocated_before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        rss_before = peak_rss_bytes()
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        info = {'rows': rows}
+
+        try:
+            yield info
+        finally:
+            event = {
+                'stage': name,
+                'start': wall_start - self.origin,
+                'wall_seconds': time.perf_counter() - wall_start,
+                'cpu_seconds': time.process_time() - cpu_start,
+                'rows': info['rows'],
+                'peak_rss_delta_bytes': peak_rss_bytes() - rss_before,
+                'thread': threading.current_thread().name
+            }
+            if self.trace_allocations:
+                allocated, peak = tracemalloc.get_traced_memory()
+                event['allocated_delta_bytes'] = allocated - allocated_before
+                event['allocated_peak_bytes'] = peak - allocated_before
+
+            self.events.append(event)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(json.dumps(event))
+            if self.callback is not None:
+                self.callback(event)
+
+    def summary(self):
+        totals = {}
+        for event in self.events:
+            total = totals.setdefault(event['stage'], {'calls': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'rows': 0})
+            total['calls'] += 1
+            total['wall_seconds'] += event['wall_seconds']
+            total['cpu_seconds'] += event['cpu_seconds']
+            total['rows'] += event['rows']
+        return totals
+
+    def chrome_trace(self):
+        # Trace Event Format, loadable by chrome://tracing, Perfetto and speedscope
+        pid = os.getpid()
+        return {
+            'traceEvents': [
+                {
+                    'name': event['stage'],
+                    'ph': 'X',
+                    'ts': event['start'] * 1e6,
+                    'dur': event['wall_seconds'] * 1e6,
+                    'pid': pid,
+                    'tid': event['thread'],
+                    'args': {key: value for key, value in event.items() if key not in ('stage', 'start', 'thread')}
+                }
+                for event in self.events
+            ],
+            'displayTimeUnit': 'ms'
+        }
+
+    def write_trace(self, file_path):
+        with open(file_path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+@contextlib.contextmanager
+def recording(trace_allocations=False, callback=None, recorder=None):
+    global active_recorder
+
+    recorder = recorder or StageRecorder(trace_allocations, callback)
+    previous, active_recorder = active_recorder, recorder
+    recorder.start()
+    try:
+        yield recorder
+    finally:
+        recorder.stop()
+        active_recorder = previous
+
+def stage(name, rows=0):
+    if active_recorder is None:
+        return NO_STAGE
+    return active_recorder.stage(name, rows)
@@ -0,0 +1,176 @@
+import csv
+import io
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+
+from instrumentation import stage
+from report_format import SECTIONS, check_sections, format_json, format_text
+from topk import top_k_series
+
+# Structured result of one analysis run
+
+@dataclass
+class ShoppingReport:
+    total_rows: int
+    total_revenue: float
+    gender_stats: pd.DataFrame
+    payment_counts: pd.DataFrame
+    sales_by_date: pd.Series
+    top_days: pd.Series
+    mall_stats: pd.DataFrame
+    average_sale: float
+    average_quantity: float
+    average_price: float
+    unique_customers: int
+    distinct_mode: str = 'exact'
+    distinct_error: Optional[float] = None
+    distinct_precision: Optional[int] = None
+    sections: Tuple[str, ...] = SECTIONS
+    rendered: Dict[tuple, str] = field(default_factory=dict, repr=False, compare=False)
+
+    # Both are None for a file with no rows, such as a header-only daily export
+
+    @property
+    def most_used_payment_method(self):
+        return self.payment_counts['Count'].idxmax() if len(self.payment_counts) else None
+
+    @property
+    def day_with_most_sales(self):
+        return self.top_days.idxmax() if len(self.top_days) else None
+
+    def render(self, output='text', sections=None):
+        # Rendered text is cached so repeated requests for the same report skip formatting
+        key = (output, None if sections is None else tuple(sections))
+        if key not in self.rendered:
+            self.rendered[key] = RENDERERS[output](self, sections)
+        return self.rendered[key]
+
+
+def with_percentages(counts, sales, total_rows, total_revenue):
+    stats = pd.DataFrame({'Count': counts, 'Total Sales': sales})
+    stats['Count %'] = (stats['Count'] / (total_rows or 1) * 100).round(2)
+    stats['Sales %'] = (stats['Total Sales'] / (total_revenue or 1) * 100).round(2)
+    return stats[['Count', 'Count %', 'Total Sales', 'Sales %']]
+
+def build_report(aggregates, top_n=7, sections=None):
+    sections = aggregates.sections if sections is None else check_sections(sections)
+    missing = [section for section in sections if section not in aggregates.sections]
+    if missing:
+        raise ValueError(f"Report section(s) {missing} were not computed; the aggregates cover {list(aggregates.sections)}")
+
+    total_rows = aggregates.total_rows
+    total_revenue = aggregates.total_revenue if aggregates.needs_sales else None
+
+    gender = aggregates.gender_stats()
+    mall = aggregates.mall_stats()
+    payment = aggregates.payment_series()
+    sales_by_date = aggregates.date_series()
+    stats = aggregates.additional_stats()
+
+    payment_counts = pd.DataFrame({
+        'Count': payment,
+        'Percentage': (payment / (total_rows or 1) * 100).round(2)
+    })
+
+    return ShoppingReport(
+        total_rows=total_rows,
+        total_revenue=total_revenue,
+        gender_stats=with_percentages(gender['Count'], gender['Total Sales'], total_rows, total_revenue),
+        payment_counts=payment_counts,
+        sales_by_date=sales_by_date,
+        top_days=top_k_series(sales_by_date, top_n),
+        mall_stats=with_percentages(mall['Count'], mall['Total Sales'], total_rows, total_revenue),
+        average_sale=stats['sales'],
+        average_quantity=stats['quantity'],
+        average_price=stats['price'],
+        unique_customers=stats['customer_id'],
+        distinct_mode=stats['customer_id_mode'],
+        distinct_error=stats.get('customer_id_error'),
+        distinct_precision=stats.get('customer_id_precision'),
+        sections=sections
+    )
+
+
+# Renderers
+
+def render_text(report, sections=None):
+    return format_text(report_dict(report), sections)
+
+def table_records(table, index_name):
+    table = table.rename(columns=lambda name: name.lower().replace(' %', '_pct').replace(' ', '_'))
+    return table.rename_axis(index_name).reset_index().to_dict('records')
+
+def report_dict(report):
+    sections = report.sections
+    data = {'total_rows': report.total_rows, 'total_revenue': report.total_revenue}
+
+    if 'gender' in sections:
+        data['gender'] = table_records(report.gender_stats, 'gender')
+    if 'payment' in sections:
+        data['payment_methods'] = table_records(report.payment_counts, 'payment_method')
+        data['most_used_payment_method'] = report.most_used_payment_method
+    if 'top-days' in sections:
+        data['top_days'] = pd.DataFrame({
+            'date': report.top_days.index.strftime('%Y-%m-%d'),
+            'sales': report.top_days.to_numpy()
+        }).to_dict('records')
+        best_day = report.day_with_most_sales
+        data['day_with_most_sales'] = None if best_day is None else f"{best_day:%Y-%m-%d}"
+    if 'malls' in sections:
+        data['shopping_malls'] = table_records(report.mall_stats, 'shopping_mall')
+    if 'stats' in sections:
+        data['additional_statistics'] = {
+            'average_transaction_value': report.average_sale,
+            'unique_customers': report.unique_customers,
+            'unique_customers_mode': report.distinct_mode,
+            'unique_customers_relative_error': report.distinct_error,
+            'unique_customers_precision': report.distinct_precision,
+            'average_items_per_transaction': report.average_quantity,
+            'average_price_per_item': report.average_price
+        }
+    return data
+
+def render_json(report, sections=None):
+    return format_json(report_dict(report), sections)
+
+def render_csv(report, sections=None):
+    # Long format: one (section, key, metric, value) row per number in the report
+    sections = check_sections(report.sections if sections is None else sections)
+    with stage("Format: CSV"):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator='\n')
+        writer.writerow(['section', 'key', 'metric', 'value'])
+
+        for name, section, table in (('gender', 'gender', report.gender_stats),
+                                     ('payment', 'payment_method', report.payment_counts),
+                                     ('malls', 'shopping_mall', report.mall_stats)):
+            if name not in sections:
+                continue
+            long = table.stack()
+            writer.writerows(
+                (section, key, metric, value)
+                for (key, metric), value in zip(long.index.tolist(), long.tolist())
+            )
+
+        if 'top-days' in sections:
+            dates = report.sales_by_date.index.strftime('%Y-%m-%d')
+            writer.writerows(('sales_by_date', date, 'Total Sales', sales)
+                             for date, sales in zip(dates, report.sales_by_date.tolist()))
+        if 'stats' in sections:
+            writer.writerows([
+                ('summary', '', 'Total Transactions', report.total_rows),
+                ('summary', '', 'Total Revenue', report.total_revenue),
+                ('summary', '', 'Average Transaction Value', report.average_sale),
+                ('summary', '', 'Unique Customers', report.unique_customers),
+                ('summary', '', 'Average Items per Transaction', report.average_quantity),
+                ('summary', '', 'Average Price per Item', report.average_price)
+            ])
+        return buffer.getvalue()
+
+RENDERERS = {
+    'text': render_text,
+    'json': render_json,
+    'csv': render_csv
+}
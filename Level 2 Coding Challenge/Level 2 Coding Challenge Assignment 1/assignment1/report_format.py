@@ -0,0 +1,155 @@
+import json
+
+from instrumentation import stage
+
+# Plain-data report formatting; stdlib only so the CLI fast path can render without importing pandas
+
+SECTIONS = ('gender', 'payment', 'top-days', 'malls', 'stats')
+TEXT_SECTIONS = ('gender', 'payment', 'top-days', 'stats')
+SECTION_KEYS = {
+    'gender': ('gender',),
+    'payment': ('payment_methods', 'most_used_payment_method'),
+    'top-days': ('top_days', 'day_with_most_sales'),
+    'malls': ('shopping_malls',),
+    'stats': ('additional_statistics',)
+}
+
+# Helper Functions
+
+def section_header(title):
+    return ["", "=" * 50, title, "=" * 50]
+
+def format_column(template, values):
+    # One str.format call renders the whole column in C; NUL never appears in a formatted number
+    values = list(values)
+    if not values:
+        return []
+    return ((template + "\0") * len(values)).format(*values).split("\0")[:-1]
+
+def format_counts(values):
+    return format_column("{:,}", values)
+
+def format_currency(values):
+    return format_column("${:,.2f}", values)
+
+def format_percentages(values):
+    return format_column("{:.2f}%", values)
+
+def column(records, key):
+    return [record[key] for record in records]
+
+def format_table(index_name, labels, columns):
+    # Same layout as DataFrame.to_string, but each column is formatted once as a batch of strings
+    labels = [str(label) for label in labels]
+    index_width = max([len(index_name)] + [len(label) for label in labels])
+    widths = [max([len(header)] + [len(value) for value in values]) for header, values in columns]
+
+    lines = [" " * index_width + "".join(" " + header.rjust(width) for (header, _), width in zip(columns, widths))]
+    lines.append(index_name.ljust(index_width) + "".join(" " * (width + 1) for width in widths))
+    for row, label in enumerate(labels):
+        lines.append(label.ljust(index_width) + "".join(
+            " " + values[row].rjust(width) for (_, values), width in zip(columns, widths)
+        ))
+    return lines
+
+def check_sections(sections):
+    unknown = [section for section in sections if section not in SECTIONS]
+    if unknown:
+        raise ValueError(f"Unknown report section(s): {unknown}; choose from {list(SECTIONS)}")
+    return tuple(sections)
+
+
+# Renderers over the report_dict structure
+
+def format_text(data, sections=None):
+    if sections is None:
+        sections = [section for section in TEXT_SECTIONS if SECTION_KEYS[section][0] in data]
+    sections = check_sections(sections)
+    lines = [f"Successfully loaded {data['total_rows']:,} rows", ""]
+
+    # Task 2 & 3: Population count AND total sales by gender
+    if 'gender' in sections:
+        with stage("Format: Gender"):
+            gender = data['gender']
+            labels = column(gender, 'gender')
+            lines += section_header("Population Count by Gender")
+            lines += format_table('gender', labels, [
+                ('Count', format_counts(column(gender, 'count'))),
+                ('Percentage', format_percentages(column(gender, 'count_pct')))
+            ])
+            lines += ["", f"Total: {data['total_rows']:,}"]
+
+            lines += section_header("Total Sales by Gender")
+            lines += format_table('gender', labels, [
+                ('Total Sales', format_currency(column(gender, 'total_sales'))),
+                ('Percentage', format_percentages(column(gender, 'sales_pct')))
+            ])
+            lines += ["", f"Grand Total: ${data['total_revenue']:,.2f}"]
+
+    # Task 4: Find most used payment method
+    if 'payment' in sections:
+        with stage("Format: Payment Method Usage"):
+            payment = data['payment_methods']
+            counts = column(payment, 'count')
+            lines += section_header("Payment Method Usage")
+            lines += format_table('payment_method', column(payment, 'payment_method'), [
+                ('Count', format_counts(counts)),
+                ('Percentage', format_percentages(column(payment, 'percentage')))
+            ])
+            lines += ["", f"Most used payment method: {data['most_used_payment_method']} "
+                          f"({max(counts, default=0):,} transactions)"]
+
+    # Task 5: Find day with the most sales
+    if 'top-days' in sections:
+        with stage("Format: Day with Most Sales"):
+            top_days = data['top_days']
+            sales = column(top_days, 'sales')
+            lines += section_header("Day with Most Sales")
+            lines += ["", f"Top {len(top_days)} days by sales:"]
+            for i, (date, amount) in enumerate(zip(column(top_days, 'date'), format_currency(sales)), 1):
+                lines.append(f"{i:2d}. {date}: {amount}")
+            lines += ["", f"Day with most sales: {data['day_with_most_sales']} (${max(sales, default=0):,.2f})"]
+
+    if 'malls' in sections:
+        with stage("Format: Shopping Mall Sales"):
+            malls = data['shopping_malls']
+            lines += section_header("Sales by Shopping Mall")
+            lines += format_table('shopping_mall', column(malls, 'shopping_mall'), [
+                ('Count', format_counts(column(malls, 'count'))),
+                ('Total Sales', format_currency(column(malls, 'total_sales'))),
+                ('Sales %', format_percentages(column(malls, 'sales_pct')))
+            ])
+
+    if 'stats' in sections:
+        with stage("Format: Additional Statistics"):
+            stats = data['additional_statistics']
+            if stats['unique_customers_mode'] == 'approx':
+                customers = (f"~{stats['unique_customers']:,} (HyperLogLog p={stats['unique_customers_precision']}, "
+                             f"±{stats['unique_customers_relative_error'] * 100:.2f}%)")
+            else:
+                customers = f"{stats['unique_customers']:,}"
+            lines += section_header("Additional Statistics")
+            lines += [
+                f"Total transactions: {data['total_rows']:,}",
+                f"Total revenue: ${data['total_revenue']:,.2f}",
+                f"Average transaction value: ${stats['average_transaction_value']:,.2f}",
+                f"Number of unique customers: {customers}",
+                f"Average items per transaction: {stats['average_items_per_transaction']:.2f}",
+                f"Average price per item: ${stats['average_price_per_item']:,.2f}"
+            ]
+
+    return "\n".join(lines)
+
+def select_sections(data, sections=None):
+    if sections is None:
+        return data
+    keys = {key for section in check_sections(sections) for key in SECTION_KEYS[section]}
+    return {key: value for key, value in data.items() if key in keys or key in ('total_rows', 'total_revenue')}
+
+def dump_json(data, indent=2):
+    # numpy scalars leak out of the tables; .item() turns them into plain Python numbers
+    return json.dumps(data, indent=indent, default=lambda value: value.item())
+
+def format_json(data, sections=None):
+    with stage("Format: JSON"):
+        return dump_json(select_sections(data, sections))
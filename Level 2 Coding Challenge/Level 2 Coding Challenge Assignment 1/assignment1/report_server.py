@@ -0,0 +1,217 @@
+import argparse
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from Asgn_1 import ShoppingAggregates, load_shopping_csv
+from column_cache import CACHE_DIR, read_csv_cached
+from report import build_report, report_dict
+from report_format import SECTION_KEYS, dump_json
+
+CONTENT_TYPES = {
+    'text': 'text/plain; charset=utf-8',
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+# Helper Functions
+
+def file_signature(file_path):
+    # mtime and size change on every rewrite or append, without reading the file
+    info = os.stat(file_path)
+    return info.st_mtime_ns, info.st_size
+
+def parse_filters(params):
+    filters = {}
+    for name in ('mall', 'category'):
+        if params.get(name):
+            filters[name] = tuple(sorted(params[name]))
+    for name in ('start', 'end'):
+        if params.get(name):
+            filters[name] = pd.Timestamp(params[name][-1])
+    return filters
+
+
+# Thread-safe LRU cache of rendered query results
+
+class LRUCache:
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        with self.lock:
+            return {'size': len(self.entries), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+# Typed columns kept resident between queries
+
+class WarmDataset:
+    def __init__(self, file_path, cache_dir=None, cache_size=256):
+        self.file_path = file_path
+        self.cache_dir = cache_dir
+        self.cache = LRUCache(cache_size)
+        self.lock = threading.Lock()
+        self.signature = None
+        self.df_csv = None
+        self.refresh()
+
+    def refresh(self):
+        signature = file_signature(self.file_path)
+        if signature == self.signature:
+            return self.df_csv, signature
+
+        with self.lock:
+            # Another request may already have reloaded while we waited for the lock
+            if signature != self.signature:
+                if self.cache_dir:
+                    df_csv = read_csv_cached(self.file_path, load_shopping_csv, self.cache_dir)
+                else:
+                    df_csv = load_shopping_csv(self.file_path)
+                self.df_csv, self.signature = df_csv, signature
+                self.cache.clear()
+            return self.df_csv, self.signature
+
+    def select(self, df_csv, filters):
+        mask = pd.Series(True, index=df_csv.index)
+        if 'mall' in filters:
+            mask &= df_csv['shopping_mall'].isin(filters['mall'])
+        if 'category' in filters:
+            mask &= df_csv['category'].isin(filters['category'])
+        if 'start' in filters:
+            mask &= df_csv['invoice_date'] >= filters['start']
+        if 'end' in filters:
+            mask &= df_csv['invoice_date'] <= filters['end']
+        return df_csv if mask.all() else df_csv[mask]
+
+    def report(self, df_csv, filters, top_n):
+        selected = self.select(df_csv, filters)
+        if selected.empty:
+            raise LookupError("No rows match the given filters")
+
+        aggregates = ShoppingAggregates()
+        aggregates.update(selected)
+        return build_report(aggregates, top_n)
+
+    def query(self, section=None, filters=None, top_n=7, output='json'):
+        filters = filters or {}
+        df_csv, signature = self.refresh()
+
+        # The file signature is part of the key, so an entry can never outlive the data it came from
+        key = (signature, section, tuple(sorted(filters.items())), top_n, output)
+        body = self.cache.get(key)
+        if body is None:
+            report = self.report(df_csv, filters, top_n)
+            body = report.render(output) if section is None else dump_json(report_dict(report)[SECTION_KEYS[section][0]])
+            self.cache.put(key, body)
+        return body
+
+    def health(self):
+        return {
+            'file_path': self.file_path,
+            'rows': len(self.df_csv),
+            'signature': list(self.signature),
+            'cache': self.cache.stats()
+        }
+
+
+# HTTP front end
+
+class ReportHandler(BaseHTTPRequestHandler):
+    dataset = None
+
+    def send_body(self, status, body, content_type='application/json'):
+        data = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_body(self, status, message):
+        self.send_body(status, dump_json({'error': message}))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+
+        if parts == ['health']:
+            return self.send_body(200, dump_json(self.dataset.health()))
+        if not parts or parts[0] != 'report' or len(parts) > 2 or (len(parts) == 2 and parts[1] not in SECTION_KEYS):
+            return self.send_error_body(404, f"Unknown path {url.path}; try /report or /report/<{'|'.join(SECTION_KEYS)}>")
+
+        section = parts[1] if len(parts) == 2 else None
+        output = params.get('format', ['json'])[-1] if section is None else 'json'
+        if output not in CONTENT_TYPES:
+            return self.send_error_body(400, f"Unknown format {output!r}")
+
+        try:
+            body = self.dataset.query(section, parse_filters(params), int(params.get('top', ['7'])[-1]), output)
+        except LookupError as error:
+            return self.send_error_body(404, str(error))
+        except ValueError as error:
+            return self.send_error_body(400, str(error))
+        self.send_body(200, body, CONTENT_TYPES[output])
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(dataset, host='127.0.0.1', port=8050, quiet=False):
+    handler = type('BoundReportHandler', (ReportHandler,), {'dataset': dataset})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.quiet = quiet
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve shopping reports from a dataset kept in memory")
+    parser.add_argument('file_path', nargs='?', default='customer_shopping_data.csv')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--cache-dir', nargs='?', const=CACHE_DIR,
+                        help=f"reuse parsed columns from this column cache on (re)load (default {CACHE_DIR})")
+    parser.add_argument('--cache-size', type=int, default=256, help="maximum number of cached query results")
+    parser.add_argument('--quiet', action='store_true', help="do not log each request")
+    args = parser.parse_args(argv)
+
+    dataset = WarmDataset(args.file_path, args.cache_dir, args.cache_size)
+    server = make_server(dataset, args.host, args.port, args.quiet)
+    print(f"Serving {len(dataset.df_csv):,} rows from {args.file_path} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
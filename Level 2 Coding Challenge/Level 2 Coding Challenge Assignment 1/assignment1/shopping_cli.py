@@ -0,0 +1,218 @@
+import argparse
+import contextlib
+import csv
+import datetime
+import glob
+import os
+from array import array
+
+# Only stdlib modules at import time; pandas/numpy are loaded by the pandas engine when it is chosen
+from cache_defaults import CACHE_DIR, CACHE_MAX_BYTES
+from instrumentation import recording
+from report_format import SECTIONS, dump_json, format_counts, format_currency, format_json, format_text
+
+# Below this the stdlib reader beats paying ~0.5 s to import pandas (see benchmark.py --startup)
+FAST_PATH_BYTES = 4 * 1024 * 1024
+DATE_FORMAT = '%d/%m/%Y'
+
+# Helper Functions
+
+def expand_paths(file_paths):
+    paths = []
+    for path in file_paths:
+        matches = sorted(glob.glob(path)) if glob.has_magic(path) else [path]
+        if not matches:
+            raise FileNotFoundError(f"No shopping data files match {path!r}")
+        paths.extend(matches)
+    return paths
+
+def percentage(part, whole):
+    return round(part / (whole or 1) * 100, 2)
+
+def group_totals(labels, sales):
+    counts, sums = {}, {}
+    for label, amount in zip(labels, sales):
+        if label:
+            counts[label] = counts.get(label, 0) + 1
+            sums[label] = sums.get(label, 0.0) + amount
+    return counts, sums
+
+def group_records(name, counts, sums, total_rows, total_revenue):
+    return [
+        {
+            name: label,
+            'count': counts[label],
+            'count_pct': percentage(counts[label], total_rows),
+            'total_sales': sums[label],
+            'sales_pct': percentage(sums[label], total_revenue)
+        }
+        for label in sorted(counts)
+    ]
+
+
+# Pure-stdlib engine for small inputs: csv module in, report_dict structure out
+
+def read_csv_columns(file_paths):
+    columns = {}
+    for file_path in file_paths:
+        with open(file_path, newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            rows = list(reader)
+        for name, values in zip(header, zip(*rows) if rows else [()] * len(header)):
+            columns.setdefault(name, []).extend(values)
+    return columns
+
+def csv_report_data(file_paths, top_n=7):
+    columns = read_csv_columns(file_paths)
+    total_rows = len(columns['quantity'])
+
+    # Prices go through float32 like SHOPPING_DTYPES does, so both engines see the same values
+    quantity = list(map(int, columns['quantity']))
+    price = array('f', map(float, columns['price']))
+    sales = [q * p for q, p in zip(quantity, price)]
+    total_revenue = sum(sales, 0.0)
+
+    gender_counts, gender_sales = group_totals(columns['gender'], sales)
+    mall_counts, mall_sales = group_totals(columns['shopping_mall'], sales)
+    payment_counts, _ = group_totals(columns['payment_method'], sales)
+
+    # Parse each distinct date string once
+    iso_dates = {}
+    for value in set(columns['invoice_date']):
+        with contextlib.suppress(ValueError):
+            iso_dates[value] = datetime.datetime.strptime(value, DATE_FORMAT).date().isoformat()
+    _, date_sales = group_totals((iso_dates.get(value) for value in columns['invoice_date']), sales)
+    top_days = sorted(date_sales.items(), key=lambda item: (-item[1], item[0]))[:top_n]
+
+    payment = sorted(sorted(payment_counts), key=lambda label: -payment_counts[label])
+    customers = set(columns['customer_id'])
+    customers.discard('')
+    rows = total_rows or 1
+
+    return {
+        'total_rows': total_rows,
+        'total_revenue': total_revenue,
+        'gender': group_records('gender', gender_counts, gender_sales, total_rows, total_revenue),
+        'payment_methods': [
+            {'payment_method': label, 'count': payment_counts[label],
+             'percentage': percentage(payment_counts[label], total_rows)}
+            for label in payment
+        ],
+        'most_used_payment_method': payment[0] if payment else None,
+        'top_days': [{'date': date, 'sales': amount} for date, amount in top_days],
+        'day_with_most_sales': top_days[0][0] if top_days else None,
+        'shopping_malls': group_records('shopping_mall', mall_counts, mall_sales, total_rows, total_revenue),
+        'additional_statistics': {
+            'average_transaction_value': total_revenue / rows,
+            'unique_customers': len(customers),
+            'unique_customers_mode': 'exact',
+            'unique_customers_relative_error': None,
+            'unique_customers_precision': None,
+            'average_items_per_transaction': sum(quantity) / rows,
+            'average_price_per_item': sum(price) / rows
+        }
+    }
+
+def render_csv_engine(file_paths, output, sections, top_n):
+    data = csv_report_data(file_paths, top_n)
+    return format_text(data, sections) if output == 'text' else format_json(data, sections)
+
+
+# pandas engine: the full analysis, imported on demand
+
+def render_pandas_engine(file_paths, output, sections, top_n, **options):
+    from Asgn_1 import shopping_report
+
+    report = shopping_report(file_paths[0] if len(file_paths) == 1 else file_paths, top_n, sections, **options)
+    return report.render(output, sections)
+
+def render_ranking(file_paths, output, by, metric, k, chunksize=None):
+    from Asgn_1 import top_k_groups
+
+    if len(file_paths) != 1:
+        raise SystemExit("--rank takes a single CSV file")
+    ranking = top_k_groups(file_paths[0], by, k, metric, chunksize=chunksize)
+    keys = [str(key.date()) if hasattr(key, 'date') else str(key) for key in ranking.index]
+    values = ranking.tolist()
+
+    if output == 'json':
+        return dump_json([{by: key, metric: value} for key, value in zip(keys, values)])
+    if output == 'csv':
+        return "\n".join([f"{by},{metric}"] + [f"{key},{value}" for key, value in zip(keys, values)])
+    formatted = format_currency(values) if metric in ('sales', 'price') else format_counts(values)
+    lines = [f"Top {len(keys)} {by} by {metric}:"]
+    lines += [f"{i:2d}. {key}: {value}" for i, (key, value) in enumerate(zip(keys, formatted), 1)]
+    return "\n".join(lines)
+
+def choose_engine(args, file_paths):
+    needs_pandas = (args.format == 'csv' or args.chunksize or args.workers or args.cache_dir
+                    or args.distinct != 'exact' or args.rank)
+    if args.engine == 'csv' and needs_pandas:
+        raise SystemExit("--engine csv only supports text/json reports without --chunksize, --workers, "
+                         "--cache-dir, --distinct approx or --rank")
+    if args.cache_dir and (args.chunksize or args.workers or len(file_paths) > 1):
+        raise SystemExit("--cache-dir only applies to a single file, without --chunksize or --workers")
+    if args.engine != 'auto':
+        return args.engine
+    if needs_pandas:
+        return 'pandas'
+    total_bytes = sum(os.path.getsize(path) for path in file_paths)
+    return 'csv' if total_bytes <= args.fast_path_bytes else 'pandas'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Report on customer shopping data")
+    parser.add_argument('file_paths', nargs='*', default=['customer_shopping_data.csv'],
+                        help="CSV files or glob patterns (default: customer_shopping_data.csv)")
+    parser.add_argument('--sections', nargs='+', choices=SECTIONS,
+                        help="report sections to include (default: all of them, malls only in json/csv)")
+    parser.add_argument('--top', type=int, default=7, help="number of top days (or --rank groups) to list")
+    parser.add_argument('--rank', metavar='COLUMN',
+                        help="instead of the report, list the top groups of COLUMN (e.g. customer_id, invoice_no)")
+    parser.add_argument('--metric', choices=['sales', 'count', 'quantity', 'price'], default='sales',
+                        help="what --rank sums per group")
+    parser.add_argument('--format', choices=['text', 'json', 'csv'], default='text', help="report output format")
+    parser.add_argument('--engine', choices=['auto', 'csv', 'pandas'], default='auto',
+                        help="csv: pure-stdlib reader for small files; auto picks it under --fast-path-bytes")
+    parser.add_argument('--fast-path-bytes', type=int, default=FAST_PATH_BYTES,
+                        help="largest total input size the auto engine sends to the csv reader")
+    parser.add_argument('--chunksize', type=int, help="stream the CSV in chunks of this many rows")
+    parser.add_argument('--workers', type=int, help="aggregate byte-range shards in this many processes")
+    parser.add_argument('--cache-dir', nargs='?', const=CACHE_DIR,
+                        help=f"reuse parsed columns cached in this directory (default {CACHE_DIR})")
+    parser.add_argument('--cache-max-bytes', type=int, default=CACHE_MAX_BYTES,
+                        help="evict least recently used cache entries beyond this many bytes")
+    parser.add_argument('--distinct', choices=['exact', 'approx'], default='exact',
+                        help="count unique customers exactly or with HyperLogLog")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="record per-stage timings and write them as a Chrome trace (JSON)")
+    parser.add_argument('--trace-allocations', action='store_true',
+                        help="also record allocation deltas with tracemalloc (slower)")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    file_paths = expand_paths(args.file_paths)
+    engine = choose_engine(args, file_paths)
+
+    trace = recording(args.trace_allocations) if args.trace else contextlib.nullcontext()
+    with trace as recorder:
+        if args.rank:
+            body = render_ranking(file_paths, args.format, args.rank, args.metric, args.top, args.chunksize)
+        elif engine == 'csv':
+            body = render_csv_engine(file_paths, args.format, args.sections, args.top)
+        else:
+            body = render_pandas_engine(file_paths, args.format, args.sections, args.top,
+                                        chunksize=args.chunksize, workers=args.workers,
+                                        cache_dir=args.cache_dir, cache_max_bytes=args.cache_max_bytes,
+                                        distinct=args.distinct)
+    if recorder is not None:
+        recorder.write_trace(args.trace)
+
+    print(body)
+    if args.format == 'text':
+        print("\n" + "=" * 50)
+
+if __name__ == "__main__":
+    main()
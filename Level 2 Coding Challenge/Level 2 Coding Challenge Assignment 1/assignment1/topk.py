@@ -0,0 +1,165 @@
+import pandas as pd
+import numpy as np
+
+from id_encoding import decode_id_column
+
+# Partials are re-reduced once they hold this many (key, total) pairs
+COMPACT_ROWS = 4_000_000
+
+# Helper Functions
+
+def top_k_positions(values, k, largest=True):
+    # Partial selection: argpartition finds the k-th value in O(n), only the k winners get sorted.
+    # Ties at the cut keep the earliest positions, the same as Series.nlargest(keep='first')
+    values = np.asarray(values)
+    positions = None
+    if values.dtype.kind == 'f':
+        missing = np.isnan(values)
+        if missing.any():
+            positions = np.flatnonzero(~missing)
+            values = values[positions]
+
+    n = len(values)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype='int64')
+
+    if k < n:
+        cut = n - k if largest else k - 1
+        threshold = values[np.argpartition(values, cut)[cut]]
+        strict = np.flatnonzero(values > threshold if largest else values < threshold)
+        ties = np.flatnonzero(values == threshold)[:k - len(strict)]
+        selected = np.concatenate([strict, ties])
+    else:
+        selected = np.arange(n)
+
+    chosen = values[selected].astype('float64')
+    order = np.lexsort((selected, -chosen if largest else chosen))
+    selected = selected[order]
+    return selected if positions is None else positions[selected]
+
+def top_k_series(series, k, largest=True):
+    return series.iloc[top_k_positions(series.to_numpy(), k, largest)]
+
+def metric_columns(metric):
+    if metric == 'count':
+        return ()
+    if metric == 'sales':
+        return ('quantity', 'price')
+    return (metric,)
+
+def metric_weights(chunk, metric):
+    if metric == 'count':
+        return None
+    if metric == 'sales':
+        return chunk['quantity'].to_numpy(dtype='float64') * chunk['price'].to_numpy(dtype='float64')
+    return chunk[metric].to_numpy(dtype='float64')
+
+def reduce_groups(keys, weights=None):
+    # One hash pass gives dense group codes; bincount then sums every group at once
+    codes, uniques = pd.factorize(keys)
+    valid = codes >= 0
+    if not valid.all():
+        codes = codes[valid]
+        weights = None if weights is None else weights[valid]
+
+    totals = np.bincount(codes, weights=weights, minlength=len(uniques))
+    if weights is None:
+        totals = totals.astype('int64')
+    return np.asarray(uniques), totals
+
+
+# Top-K of any metric over any grouping column, folded in chunk by chunk
+
+class TopK:
+    def __init__(self, by, metric='sales', k=10, largest=True, groups_span_chunks=True):
+        self.by = by
+        self.metric = metric
+        self.k = k
+        self.largest = largest
+        # When every group sits inside a single chunk (e.g. invoice_no), only each chunk's top-K is kept
+        self.groups_span_chunks = groups_span_chunks
+        self.spec = None
+        self.keys = []
+        self.totals = []
+        self.pending_rows = 0
+
+    @property
+    def columns(self):
+        return (self.by,) + metric_columns(self.metric)
+
+    def canonical_keys(self, chunk):
+        # Encoded ID columns stay as ints while every chunk shares the first chunk's prefix/width
+        values = chunk[self.by]
+        spec = chunk.attrs.get('id_encodings', {}).get(self.by)
+        if not self.keys and self.spec is None and spec and spec['kind'] == 'prefix':
+            self.spec = spec
+        if spec is not None and spec == self.spec:
+            return values.to_numpy()
+
+        self.use_string_keys()
+        if spec is None:
+            return values.to_numpy()
+        return decode_id_column(values, spec).to_numpy(dtype=object, na_value=None)
+
+    def use_string_keys(self):
+        if self.spec is not None:
+            self.keys = [decode_id_column(pd.Series(keys), self.spec).to_numpy(dtype=object) for keys in self.keys]
+            self.spec = None
+
+    def update(self, chunk):
+        keys, totals = reduce_groups(self.canonical_keys(chunk), metric_weights(chunk, self.metric))
+        if self.metric == 'quantity':
+            totals = np.rint(totals).astype('int64')
+        self.add_partial(keys, totals)
+        return self
+
+    def add_partial(self, keys, totals):
+        if not self.groups_span_chunks:
+            best = top_k_positions(totals, self.k, self.largest)
+            keys, totals = keys[best], totals[best]
+
+        self.keys.append(keys)
+        self.totals.append(totals)
+        self.pending_rows += len(keys)
+        if self.pending_rows > COMPACT_ROWS or (not self.groups_span_chunks and len(self.keys) > 64):
+            self.compact()
+
+    def compact(self):
+        if len(self.keys) <= 1:
+            return
+        keys = np.concatenate(self.keys)
+        totals = np.concatenate(self.totals)
+
+        if self.groups_span_chunks:
+            keys, totals = reduce_groups(keys, totals)
+            totals = totals.astype(self.totals[0].dtype)
+        else:
+            # Merging per-chunk winners: the overall top-K is the top-K of the candidates
+            best = top_k_positions(totals, self.k, self.largest)
+            keys, totals = keys[best], totals[best]
+
+        self.keys, self.totals = [keys], [totals]
+        self.pending_rows = len(keys)
+
+    def merge(self, other):
+        if not self.keys and self.spec is None:
+            self.spec = other.spec
+        if other.spec != self.spec:
+            self.use_string_keys()
+            other.use_string_keys()
+        for keys, totals in zip(other.keys, other.totals):
+            self.add_partial(keys, totals)
+        return self
+
+    def result(self):
+        self.compact()
+        if not self.keys:
+            return pd.Series([], name=self.metric, index=pd.Index([], name=self.by), dtype='float64')
+
+        keys, totals = self.keys[0], self.totals[0]
+        best = top_k_positions(totals, self.k, self.largest)
+        index = pd.Index(keys[best], name=self.by)
+        if self.spec is not None:
+            index = pd.Index(decode_id_column(pd.Series(keys[best]), self.spec), name=self.by)
+        return pd.Series(totals[best], index=index, name=self.metric)
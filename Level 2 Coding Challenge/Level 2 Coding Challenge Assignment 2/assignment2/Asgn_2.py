@@ -1,7 +1,13 @@
 import threading
 import queue
 import time
-from typing import List, Union
+from typing import List, Optional, Union
+
+from checksums import TransferChecksum, checksum_checks, locate_mismatches
+from metrics import TransferMetrics, lacks_room
+
+# Marks a destination slot that no consumer has filled yet
+EMPTY_SLOT = None
 
 # Helper Functionts
 
@@ -41,87 +47,654 @@ def verify_containers(source, destination):
     return all(c[1] for c in checks), checks, passed, failed
 
 
+class QueueClosed(Exception):
+    pass
+
+
+# Bounded queue that can move a whole batch of items per lock acquisition. close() wakes every
+# waiter: producers get QueueClosed, consumers drain what is left and then get QueueClosed.
+
+class BatchQueue(queue.Queue):
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.closed = False
+        # Genuine full/empty notifications, sharing the queue's mutex; only signalled while someone waits
+        self.became_full = threading.Condition(self.mutex)
+        self.became_empty = threading.Condition(self.mutex)
+        self.level_waiters = 0
+        # Called with "full" or "empty" by the put or get that brings the queue to that level
+        self.on_level = None
+        # Set to a dict by TransferMetrics: enqueue time of each entry, keyed by its first field
+        self.stamps = None
+
+    def wait_until(self, condition, predicate, block, timeout):
+        # Checks first so the common case never builds a wait
+        if predicate():
+            return True
+        return block and condition.wait_for(predicate, timeout)
+
+    def notify_level(self):
+        # A put can only leave the queue full and a get only empty, so each signal is a real transition
+        if self.level_waiters or self.on_level:
+            if self.maxsize > 0 and self._qsize() >= self.maxsize:
+                self.became_full.notify_all()
+                level = "full"
+            elif not self._qsize():
+                self.became_empty.notify_all()
+                level = "empty"
+            else:
+                return
+            if self.on_level:
+                self.on_level(level)
+
+    def close(self):
+        with self.mutex:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+            self.became_full.notify_all()
+            self.became_empty.notify_all()
+
+    def put(self, item, block=True, timeout=None):
+        with self.not_full:
+            if 0 < self.maxsize <= self._qsize():
+                has_room = lambda: self.closed or self._qsize() < self.maxsize
+                if not self.wait_until(self.not_full, has_room, block, timeout):
+                    raise queue.Full
+            if self.closed:
+                raise QueueClosed("put() on a closed queue")
+            self._put(item)
+            if self.stamps is not None:
+                self.stamps[item[0]] = time.perf_counter()
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+            self.notify_level()
+
+    def get(self, block=True, timeout=None):
+        with self.not_empty:
+            if not self._qsize():
+                if not self.wait_until(self.not_empty, lambda: self._qsize() or self.closed, block, timeout):
+                    raise queue.Empty
+                if not self._qsize():
+                    raise QueueClosed("queue closed and drained")
+            item = self._get()
+            self.not_full.notify()
+            self.notify_level()
+            return item
+
+    def put_many(self, items, block=True, timeout=None):
+        # Puts as many items as fit, waiting for room between partial batches
+        start = 0
+        while start < len(items):
+            with self.not_full:
+                if self.maxsize > 0:
+                    has_room = lambda: self.closed or self._qsize() < self.maxsize
+                    if not self.wait_until(self.not_full, has_room, block, timeout):
+                        raise queue.Full
+                    end = min(len(items), start + self.maxsize - self._qsize())
+                else:
+                    end = len(items)
+                if self.closed:
+                    raise QueueClosed("put_many() on a closed queue")
+
+                self.queue.extend(items[start:end])
+                self.unfinished_tasks += end - start
+                self.not_empty.notify(end - start)
+                self.notify_level()
+                start = end
+
+    def get_many(self, max_items, block=True, timeout=None):
+        with self.not_empty:
+            if not self.wait_until(self.not_empty, lambda: self._qsize() or self.closed, block, timeout):
+                raise queue.Empty
+            if not self._qsize():
+                raise QueueClosed("queue closed and drained")
+
+            count = min(max_items, self._qsize())
+            if count == self._qsize():
+                items = list(self.queue)
+                self.queue.clear()
+            else:
+                popleft = self.queue.popleft
+                items = [popleft() for _ in range(count)]
+            self.not_full.notify(count)
+            self.notify_level()
+            return items
+
+    def wait_level(self, condition, predicate, timeout):
+        # True once the level is reached; False on timeout, or once the queue is closed short of it
+        with condition:
+            self.level_waiters += 1
+            try:
+                condition.wait_for(lambda: predicate() or self.closed, timeout)
+                return predicate()
+            finally:
+                self.level_waiters -= 1
+
+    def wait_until_full(self, timeout=None):
+        return self.wait_level(self.became_full, lambda: 0 < self.maxsize <= self._qsize(), timeout)
+
+    def wait_until_empty(self, timeout=None):
+        return self.wait_level(self.became_empty, lambda: not self._qsize(), timeout)
+
+    def task_done_many(self, count):
+        with self.all_tasks_done:
+            unfinished = self.unfinished_tasks - count
+            if unfinished < 0:
+                raise ValueError('task_done_many() called too many times')
+            if unfinished == 0:
+                self.all_tasks_done.notify_all()
+            self.unfinished_tasks = unfinished
+
+
+# Queue of (start, items, tags) segments; capacity and qsize count items, not entries
+
+class SegmentQueue(BatchQueue):
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self.items = 0
+
+    def _qsize(self):
+        return self.items
+
+    def _put(self, segment):
+        self.queue.append(segment)
+        self.items += len(segment[1])
+
+    def _get(self):
+        segment = self.queue.popleft()
+        self.items -= len(segment[1])
+        return segment
+
+    def put_segment(self, start, values, tags=None, block=True, timeout=None):
+        # Splits the segment at the free room, so the queue never holds more than maxsize items.
+        # Returns the pieces actually queued, which is what the consumers will see.
+        pieces = []
+        offset = 0
+        while offset < len(values):
+            with self.not_full:
+                has_room = lambda: self.closed or self.maxsize <= 0 or self.items < self.maxsize
+                if not self.wait_until(self.not_full, has_room, block, timeout):
+                    raise queue.Full
+                if self.closed:
+                    raise QueueClosed("put_segment() on a closed queue")
+
+                end = len(values) if self.maxsize <= 0 else min(len(values), offset + self.maxsize - self.items)
+                segment = (start + offset, values[offset:end], None if tags is None else tags[offset:end])
+                self._put(segment)
+                if self.stamps is not None:
+                    self.stamps[segment[0]] = time.perf_counter()
+                self.unfinished_tasks += 1
+                self.not_empty.notify()
+                self.notify_level()
+                pieces.append(segment)
+                offset = end
+        return pieces
+
+    def get_segment(self, block=True, timeout=None):
+        return self.get(block, timeout)
+
+
+# Bounded single-producer/single-consumer channel over a preallocated list. Only the producer moves
+# head and only the consumer moves tail, so puts and gets take no lock; an Event is only touched
+# when the other side has parked itself on a full or empty ring. A slot holds one item or one
+# segment; capacity is counted in items either way.
+
+class RingBuffer:
+    def __init__(self, maxsize):
+        if maxsize < 1:
+            raise ValueError("A ring buffer needs at least one slot")
+        self.maxsize = maxsize
+        self.slots = [None] * maxsize
+        self.head = 0         # slots ever filled, written by the producer only
+        self.tail = 0         # slots ever emptied, written by the consumer only
+        self.items_in = 0     # items ever put, written by the producer only
+        self.items_out = 0    # items ever taken, written by the consumer only
+        self.not_full = threading.Event()
+        self.not_empty = threading.Event()
+        self.producer_waiting = False
+        self.consumer_waiting = False
+        self.closed = False
+        # Full/empty notifications as in BatchQueue; only set while someone waits on them
+        self.became_full = threading.Event()
+        self.became_empty = threading.Event()
+        self.level_waiters = 0
+        self.on_level = None
+        self.stamps = None    # as for BatchQueue; stamped before the consumer can see the slot
+
+    def qsize(self):
+        return self.items_in - self.items_out
+
+    def empty(self):
+        return self.head == self.tail
+
+    def full(self):
+        return self.items_in - self.items_out >= self.maxsize
+
+    def blocks_put(self):
+        return not self.closed and self.items_in - self.items_out >= self.maxsize
+
+    def blocks_get(self):
+        return not self.closed and self.head == self.tail
+
+    def close(self):
+        # Both events are set so a parked side wakes up and sees the flag
+        self.closed = True
+        self.not_empty.set()
+        self.not_full.set()
+        self.became_full.set()
+        self.became_empty.set()
+
+    def park(self, event, waiting, is_blocked, block, timeout, error):
+        # Announce the wait, re-check, then sleep until the other side sets the event
+        if not is_blocked():
+            return
+        if not block:
+            raise error
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while is_blocked():
+            event.clear()
+            setattr(self, waiting, True)
+            try:
+                if is_blocked():
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if (remaining is not None and remaining <= 0) or not event.wait(remaining):
+                        raise error
+            finally:
+                setattr(self, waiting, False)
+
+    def notify_level(self):
+        if self.items_in - self.items_out >= self.maxsize:
+            self.became_full.set()
+            level = "full"
+        elif self.head == self.tail:
+            self.became_empty.set()
+            level = "empty"
+        else:
+            return
+        if self.on_level:
+            self.on_level(level)
+
+    def wait_level(self, event, predicate, timeout):
+        # Same contract as BatchQueue.wait_level. Announce the wait, clear, then re-check, so a
+        # level reached in between is seen either by the check or by the other side's notify
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.level_waiters += 1
+        try:
+            while not (predicate() or self.closed):
+                event.clear()
+                if predicate() or self.closed:
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if (remaining is not None and remaining <= 0) or not event.wait(remaining):
+                    break
+            return predicate()
+        finally:
+            self.level_waiters -= 1
+
+    def wait_until_full(self, timeout=None):
+        return self.wait_level(self.became_full, self.full, timeout)
+
+    def wait_until_empty(self, timeout=None):
+        return self.wait_level(self.became_empty, self.empty, timeout)
+
+    def put(self, item, block=True, timeout=None):
+        self.park(self.not_full, 'producer_waiting', self.blocks_put, block, timeout, queue.Full)
+        if self.closed:
+            raise QueueClosed("put() on a closed ring")
+        self.slots[self.head % self.maxsize] = item
+        if self.stamps is not None:
+            self.stamps[item[0]] = time.perf_counter()
+        self.head += 1
+        self.items_in += 1
+        if self.consumer_waiting:
+            self.not_empty.set()
+        if self.level_waiters or self.on_level:
+            self.notify_level()
+
+    def get(self, block=True, timeout=None):
+        self.park(self.not_empty, 'consumer_waiting', self.blocks_get, block, timeout, queue.Empty)
+        if self.head == self.tail:
+            raise QueueClosed("ring closed and drained")
+        position = self.tail % self.maxsize
+        item = self.slots[position]
+        self.slots[position] = None
+        self.tail += 1
+        self.items_out += 1
+        if self.producer_waiting:
+            self.not_full.set()
+        if self.level_waiters or self.on_level:
+            self.notify_level()
+        return item
+
+    def put_nowait(self, item):
+        self.put(item, block=False)
+
+    def get_nowait(self):
+        return self.get(block=False)
+
+    def put_many(self, items, block=True, timeout=None):
+        offset = 0
+        while offset < len(items):
+            self.park(self.not_full, 'producer_waiting', self.blocks_put, block, timeout, queue.Full)
+            if self.closed:
+                raise QueueClosed("put_many() on a closed ring")
+            count = min(len(items) - offset, self.maxsize - self.qsize())
+
+            # At most two slice copies: up to the end of the list, then from its start
+            start = self.head % self.maxsize
+            first = min(count, self.maxsize - start)
+            self.slots[start:start + first] = items[offset:offset + first]
+            self.slots[:count - first] = items[offset + first:offset + count]
+
+            self.head += count
+            self.items_in += count
+            offset += count
+            if self.consumer_waiting:
+                self.not_empty.set()
+            if self.level_waiters or self.on_level:
+                self.notify_level()
+
+    def get_many(self, max_items, block=True, timeout=None):
+        self.park(self.not_empty, 'consumer_waiting', self.blocks_get, block, timeout, queue.Empty)
+        if self.head == self.tail:
+            raise QueueClosed("ring closed and drained")
+        count = min(max_items, self.head - self.tail)
+
+        start = self.tail % self.maxsize
+        first = min(count, self.maxsize - start)
+        items = self.slots[start:start + first] + self.slots[:count - first]
+        self.slots[start:start + first] = [None] * first
+        self.slots[:count - first] = [None] * (count - first)
+
+        self.tail += count
+        self.items_out += count
+        if self.producer_waiting:
+            self.not_full.set()
+        if self.level_waiters or self.on_level:
+            self.notify_level()
+        return items
+
+    def put_segment(self, start, values, tags=None, block=True, timeout=None):
+        # Same contract as SegmentQueue.put_segment, one slot per piece
+        pieces = []
+        offset = 0
+        while offset < len(values):
+            self.park(self.not_full, 'producer_waiting', self.blocks_put, block, timeout, queue.Full)
+            if self.closed:
+                raise QueueClosed("put_segment() on a closed ring")
+            end = min(len(values), offset + self.maxsize - self.qsize())
+            segment = (start + offset, values[offset:end], None if tags is None else tags[offset:end])
+
+            self.slots[self.head % self.maxsize] = segment
+            if self.stamps is not None:
+                self.stamps[segment[0]] = time.perf_counter()
+            self.head += 1
+            self.items_in += end - offset
+            if self.consumer_waiting:
+                self.not_empty.set()
+            if self.level_waiters or self.on_level:
+                self.notify_level()
+            pieces.append(segment)
+            offset = end
+        return pieces
+
+    def get_segment(self, block=True, timeout=None):
+        self.park(self.not_empty, 'consumer_waiting', self.blocks_get, block, timeout, queue.Empty)
+        if self.head == self.tail:
+            raise QueueClosed("ring closed and drained")
+        position = self.tail % self.maxsize
+        segment = self.slots[position]
+        self.slots[position] = None
+        self.tail += 1
+        self.items_out += len(segment[1])
+        if self.producer_waiting:
+            self.not_full.set()
+        if self.level_waiters or self.on_level:
+            self.notify_level()
+        return segment
+
+    # Nothing joins on the ring; these keep it interchangeable with BatchQueue
+    def task_done(self):
+        pass
+
+    def task_done_many(self, count):
+        pass
+
+
 class ProducerConsumer:
-    def __init__(self, source_data: List[Union[int, float]]):
+    def __init__(self, source_data: List[Union[int, float]], batch_size: Optional[int] = None,
+                 producers: int = 1, consumers: int = 1, channel: str = 'queue',
+                 queue_capacity: Optional[int] = None, metrics: bool = False):
         # Task 1: Source container with integers and doubles
         self.source_container = source_data.copy()
         source_capacity = len(self.source_container)
         
-        # Task 2: Destination container with same capacity
-        self.destination_container = []
-        
-        # Task 3: Queue with half the capacity of source
-        queue_capacity = source_capacity // 2
-        self.shared_queue = queue.Queue(maxsize=queue_capacity)
+        # Task 2: Destination container with same capacity, preallocated so consumers fill slots by index
+        self.destination_container = [EMPTY_SLOT] * source_capacity
         
-        self.lock = threading.Lock()
-        self.producer_done = threading.Event()
+        # Task 3: Queue with half the capacity of source unless another capacity is given (load tests
+        # sweep it); entries are (index, item) pairs
+        if queue_capacity is None:
+            queue_capacity = source_capacity // 2
+        if channel == 'queue':
+            # Batched mode moves (start, items) segments, per-item mode (index, item) pairs
+            shared_queue = (SegmentQueue if batch_size else BatchQueue)(maxsize=queue_capacity)
+        elif channel == 'ring':
+            if producers != 1 or consumers != 1:
+                raise ValueError("The ring channel supports exactly one producer and one consumer")
+            # queue.Queue treats maxsize 0 as unbounded; a ring needs at least one slot
+            shared_queue = RingBuffer(maxsize=max(queue_capacity, 1))
+        else:
+            raise ValueError(f"Unknown channel {channel!r}; choose 'queue' or 'ring'")
+
+        self.init_workers(source_capacity, shared_queue, channel, batch_size, producers, consumers, metrics)
+        if not batch_size:
+            # Tasks 4 and 5: the queue reports its own full/empty transitions
+            shared_queue.on_level = self.announce_level
         
         print("Initialized:")
         print(f"  Source capacity: {source_capacity}")
         print(f"  Queue capacity: {queue_capacity}")
+        if channel != 'queue':
+            print(f"  Channel: {channel}")
+        if batch_size:
+            print(f"  Batch size: {batch_size}")
+        if producers > 1 or consumers > 1:
+            print(f"  Producers: {producers}, Consumers: {consumers}")
         print(f"  Source data: {self._format_list_preview(self.source_container)}")
+
+    def init_workers(self, source_capacity, shared_queue, channel, batch_size, producers, consumers, metrics=False):
+        # Worker, channel, checksum and metrics state shared by every backend; subclasses that lay
+        # out the containers differently call this too
+        if producers < 1 or consumers < 1:
+            raise ValueError("Need at least one producer and one consumer")
+        self.shared_queue = shared_queue
+        self.channel = channel
+        # Performance mode: items move in batches, without the per-item sleeps and status lines
+        self.batch_size = batch_size
+
+        # Each producer copies one contiguous slice of the source; consumers take whatever is queued
+        self.producers = producers
+        self.consumers = consumers
+        self.partitions = [(source_capacity * i // producers, source_capacity * (i + 1) // producers)
+                           for i in range(producers)]
+        
+        self.lock = threading.Lock()
+        self.producers_running = producers
+        self.consumed_count = 0
+
+        # Task 6 support: producers checksum what they queued and consumers the slots they wrote, so
+        # verify() needs one hashing pass over the destination instead of copies and sorts
+        self.producer_checksums = [TransferChecksum(multiset=False) for _ in range(producers)]
+        self.consumer_checksums = [TransferChecksum(multiset=False) for _ in range(consumers)]
+
+        # Opt-in throughput, blocking, latency and queue depth counters, kept per worker like the
+        # checksums; off by default so the batched hot path stays a single put or get per segment
+        self.metrics = TransferMetrics(shared_queue, producers, consumers) if metrics else None
+
+    def actor_name(self, role, worker):
+        count = self.producers if role == "Producer" else self.consumers
+        return role if count == 1 else f"{role}-{worker + 1}"
+
+    def announce_level(self, level):
+        # Called by the put that filled the queue or the get that drained it, in that worker's thread,
+        # as the queue raises its became_full/became_empty signal
+        actor = threading.current_thread().name
+        if level == "full":
+            print_notification(actor, "Queue is FULL! Consumer notified")
+        else:
+            print_notification(actor, "Queue is EMPTY. Producer notified !!!")
+
+    def producer_finished(self):
+        # The last producer to finish closes the queue, which wakes every waiting consumer at once
+        with self.lock:
+            self.producers_running -= 1
+            if self.producers_running == 0:
+                self.shared_queue.close()
     
     # Task 4: Producer reads from source container into queue and notifies consumer when queue is full
-    def producer(self):
-        print_status("Producer", "Starting...")
-        
-        for number in self.source_container:
-            self.shared_queue.put(number)           
-            print_status("Producer", "Produced", 
-                        f"{number} (Queue: {self.shared_queue.qsize()}/{self.shared_queue.maxsize})")
-                        
-            if self.shared_queue.full():
-                print_notification("Producer", "Queue is FULL! Consumer notified")           
-            time.sleep(0.01)
+    def producer(self, worker: int = 0):
+        if self.batch_size:
+            return self.batch_producer(worker)
+        actor = self.actor_name("Producer", worker)
+        print_status(actor, "Starting...")
         
-        self.producer_done.set()
-        print_completion("Producer")
+        start, end = self.partitions[worker]
+        checksum = self.producer_checksums[worker]
+        metrics = self.metrics and self.metrics.producers[worker]
+        try:
+            for index in range(start, end):
+                number = self.source_container[index]
+                checksum.add_pair(index, number)
+                if metrics:
+                    waited, began = self.shared_queue.full(), time.perf_counter()
+                self.shared_queue.put((index, number))
+                if metrics:
+                    metrics.record(1, waited, time.perf_counter() - began)
+                print_status(actor, "Produced", 
+                            f"{number} (Queue: {self.shared_queue.qsize()}/{self.shared_queue.maxsize})")
+                time.sleep(0.01)
+        finally:
+            # Even a failed producer must count itself out, or the consumers would wait forever
+            self.producer_finished()
+        print_completion(actor)
     
     # Task 5: Consumer reads from queue into destination container and notifies producer when queue is empty
-    def consumer(self):
-        print_status("Consumer", "Starting...")
+    def consumer(self, worker: int = 0):
+        if self.batch_size:
+            return self.batch_consumer(worker)
+        actor = self.actor_name("Consumer", worker)
+        print_status(actor, "Starting...")
         
+        checksum = self.consumer_checksums[worker]
+        metrics = self.metrics and self.metrics.consumers[worker]
         while True:
+            if metrics:
+                depth, began = self.shared_queue.qsize(), time.perf_counter()
             try:
-                number = self.shared_queue.get(timeout=0.1)
-                
-                with self.lock:
-                    self.destination_container.append(number)
-                    dest_size = len(self.destination_container)
-                
-                print_status("Consumer", "Consumed", 
-                           f"{number} (Destination: {dest_size}/{len(self.source_container)})")
-                
-                if self.shared_queue.empty():
-                    print_notification("Consumer", "Queue is EMPTY. Producer notified !!!")
-                
-                self.shared_queue.task_done()                
-                time.sleep(0.015)
-                
-            except queue.Empty:
-                if self.producer_done.is_set() and self.shared_queue.empty():
-                    print_completion("Consumer")
-                    break
+                index, number = self.shared_queue.get()
+            except QueueClosed:
+                if metrics:
+                    metrics.record(0, not depth, time.perf_counter() - began)
+                print_completion(actor)
+                break
+            if metrics:
+                metrics.received(index, 1, depth, began)
+            
+            # Every index is written by exactly one consumer, so the slot itself needs no lock
+            self.destination_container[index] = number
+            checksum.add_pair(index, self.destination_container[index])
+            with self.lock:
+                self.consumed_count += 1
+                dest_size = self.consumed_count
+            
+            print_status(actor, "Consumed", 
+                       f"{number} (Destination: {dest_size}/{len(self.source_container)})")
+            
+            self.shared_queue.task_done()                
+            time.sleep(0.015)
     
+    def batch_producer(self, worker: int = 0):
+        source, size = self.source_container, self.batch_size
+        start, end = self.partitions[worker]
+        checksum = self.producer_checksums[worker]
+        metrics = self.metrics and self.metrics.producers[worker]
+        try:
+            for batch_start in range(start, end, size):
+                batch_end = min(end, batch_start + size)
+                if metrics:
+                    waited, began = lacks_room(self.shared_queue, batch_end - batch_start), time.perf_counter()
+                pieces = self.shared_queue.put_segment(batch_start, source[batch_start:batch_end])
+                if metrics:
+                    metrics.record(batch_end - batch_start, waited, time.perf_counter() - began)
+                for segment_start, items, _ in pieces:
+                    checksum.add_segment(segment_start, items)
+        finally:
+            self.producer_finished()
+
+    def batch_consumer(self, worker: int = 0):
+        # One queue lock and one slice assignment per segment, and no destination lock at all
+        destination = self.destination_container
+        checksum = self.consumer_checksums[worker]
+        metrics = self.metrics and self.metrics.consumers[worker]
+        while True:
+            if metrics:
+                depth, began = self.shared_queue.qsize(), time.perf_counter()
+            try:
+                start, items, _ = self.shared_queue.get_segment()
+            except QueueClosed:
+                if metrics:
+                    metrics.record(0, not depth, time.perf_counter() - began)
+                break
+            if metrics:
+                metrics.received(start, len(items), depth, began)
+
+            end = start + len(items)
+            destination[start:end] = items
+            checksum.add_segment(start, destination[start:end])
+            self.shared_queue.task_done()
+
     def run(self):
-        producer_thread = threading.Thread(target=self.producer, name="Producer")
-        consumer_thread = threading.Thread(target=self.consumer, name="Consumer")
+        producer_threads = [threading.Thread(target=self.producer, args=(i,), name=self.actor_name("Producer", i))
+                            for i in range(self.producers)]
+        consumer_threads = [threading.Thread(target=self.consumer, args=(i,), name=self.actor_name("Consumer", i))
+                            for i in range(self.consumers)]
         
-        consumer_thread.start()
-        producer_thread.start()
+        if self.metrics:
+            self.metrics.start()
+        for thread in consumer_threads + producer_threads:
+            thread.start()
         
-        producer_thread.join()
-        consumer_thread.join()
+        for thread in producer_threads + consumer_threads:
+            thread.join()
+        if self.metrics:
+            self.metrics.stop()
+
+    def filled_destination(self):
+        # Slots no consumer reached stay EMPTY_SLOT; leaving them out shows up as a length mismatch
+        return [item for item in self.destination_container if item is not EMPTY_SLOT]
     
+    def verification_checks(self):
+        # O(n) hashing, not O(n log n). The destination is re-read over the segments the producers
+        # sent, so a slot changed after its consumer wrote it is still caught. Only a failed order
+        # check re-reads source and destination again for the per-item multiset hashes
+        sent = TransferChecksum.combine(self.producer_checksums)
+        written = TransferChecksum.combine(self.consumer_checksums)
+        landed = sent.reread(self.destination_container, multiset=False)
+
+        def multisets():
+            return (sent.reread(self.source_container).unordered,
+                    sent.reread(self.destination_container).unordered)
+
+        return checksum_checks(len(self.source_container), len(self.destination_container),
+                               sent, written, landed, multisets)
+
     # Task 6: Test to confirm numbers from source were copied to destination
     def verify(self) -> bool:
         print_section_header("Verification Results")
         
-        success, all_checks, passed, failed = verify_containers(
-            self.source_container, 
-            self.destination_container
-        )
+        success, all_checks, passed, failed = self.verification_checks()
         
         for check_name, _, detail in passed:
             print(f"O {check_name}: {detail}")
@@ -147,21 +720,22 @@ class ProducerConsumer:
         return f"{preview}{suffix}"
     
     def _show_mismatches(self, max_show=5):
-        count = 0
-        for i, (src, dst) in enumerate(zip(self.source_container, self.destination_container)):
-            if src != dst:
-                print(f"    Index {i}: expected {src}, got {dst}")
-                count += 1
-                if count >= max_show:
-                    print(f"    (showing first {max_show} mismatches)")
-                    break
+        # Bisection over range checksums; only ranges that differ are compared item by item
+        mismatches = locate_mismatches(self.source_container, self.destination_container, max_show)
+        for i in mismatches:
+            src = self.source_container[i] if i < len(self.source_container) else None
+            dst = self.destination_container[i] if i < len(self.destination_container) else None
+            print(f"    Index {i}: expected {src}, got {dst}")
+        if len(mismatches) >= max_show:
+            print(f"    (showing first {max_show} mismatches)")
     
     def display_summary(self):
         print(f"\nSource Container ({len(self.source_container)} items):")
         print(f"  {self._format_list_preview(self.source_container)}")
         
-        print(f"\nDestination Container ({len(self.destination_container)} items):")
-        print(f"  {self._format_list_preview(self.destination_container)}")
+        destination = self.filled_destination()
+        print(f"\nDestination Container ({len(destination)} items):")
+        print(f"  {self._format_list_preview(destination)}")
 
 
 def main():
@@ -0,0 +1,189 @@
+import argparse
+import asyncio
+import time
+from typing import AsyncIterable, Awaitable, Callable, Iterable, Optional
+
+from Asgn_2 import print_completion, print_notification, print_section_header
+
+# Put on the queue by close(); each consumer that sees it puts it back for the next one
+CLOSED = object()
+
+# Helper Functions
+
+async def iterate(items, delay=0.0):
+    # Async iterable over an in-memory list, optionally pausing like a slow socket would
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+
+class ListSink:
+    # Async sink that appends to a list
+    def __init__(self, delay=0.0):
+        self.items = []
+        self.delay = delay
+
+    async def __call__(self, item):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.items.append(item)
+
+
+class ChannelClosed(Exception):
+    pass
+
+
+# Bounded asyncio channel with close semantics and awaitable full/empty events
+
+class AsyncChannel:
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.queue = asyncio.Queue(maxsize)
+        self.size = 0
+        self.closed = False
+        self.full = asyncio.Event()
+        self.empty = asyncio.Event()
+        self.empty.set()
+
+    def qsize(self):
+        return self.size
+
+    async def put(self, item):
+        if self.closed:
+            raise ChannelClosed("put() on a closed channel")
+        # Backpressure: suspends this task while the channel holds maxsize items
+        await self.queue.put(item)
+        self.size += 1
+        self.empty.clear()
+        if 0 < self.maxsize <= self.size:
+            self.full.set()
+
+    async def get(self):
+        item = await self.queue.get()
+        if item is CLOSED:
+            # A slot was just freed, so passing the marker on cannot block
+            self.queue.put_nowait(CLOSED)
+            raise ChannelClosed("channel closed and drained")
+        self.size -= 1
+        self.full.clear()
+        if self.size == 0:
+            self.empty.set()
+        return item
+
+    async def close(self):
+        # Consumers drain what is already queued before they see the marker
+        if not self.closed:
+            self.closed = True
+            await self.queue.put(CLOSED)
+
+    async def wait_full(self):
+        await self.full.wait()
+
+    async def wait_empty(self):
+        await self.empty.wait()
+
+
+# Many producer and consumer tasks on one event loop, moving items from async sources to async sinks
+
+class AsyncProducerConsumer:
+    def __init__(self, sources: Iterable[AsyncIterable], sinks: Iterable[Callable[[object], Awaitable]],
+                 declared_size: Optional[int] = None, maxsize: Optional[int] = None, verbose: bool = False):
+        self.sources = list(sources)
+        self.sinks = list(sinks)
+        if not self.sinks:
+            raise ValueError("Need at least one sink")
+
+        # Task 3: Queue with half the capacity of the (declared) source, unless a bound is given
+        if maxsize is None:
+            if declared_size is None:
+                raise ValueError("Give declared_size (capacity is half of it) or maxsize")
+            maxsize = declared_size // 2
+        self.channel = AsyncChannel(maxsize)
+
+        self.verbose = verbose
+        self.produced = 0
+        self.consumed = 0
+
+        print("Initialized:")
+        print(f"  Queue capacity: {maxsize}")
+        print(f"  Producer tasks: {len(self.sources)}, Consumer tasks: {len(self.sinks)}")
+
+    async def producer(self, source, worker=0):
+        async for item in source:
+            await self.channel.put(item)
+            self.produced += 1
+            if self.verbose and self.channel.full.is_set():
+                print_notification(f"Producer-{worker + 1}", "Queue is FULL! Consumer notified")
+        if self.verbose:
+            print_completion(f"Producer-{worker + 1}")
+
+    async def consumer(self, sink, worker=0):
+        while True:
+            try:
+                item = await self.channel.get()
+            except ChannelClosed:
+                break
+            await sink(item)
+            self.consumed += 1
+            if self.verbose and self.channel.empty.is_set():
+                print_notification(f"Consumer-{worker + 1}", "Queue is EMPTY. Producer notified !!!")
+        if self.verbose:
+            print_completion(f"Consumer-{worker + 1}")
+
+    async def close_when_done(self, producers):
+        await asyncio.gather(*producers)
+        await self.channel.close()
+
+    async def run(self):
+        consumers = [asyncio.create_task(self.consumer(sink, i)) for i, sink in enumerate(self.sinks)]
+        producers = [asyncio.create_task(self.producer(source, i)) for i, source in enumerate(self.sources)]
+        try:
+            # Fails fast: one raising task cancels the rest instead of leaving them blocked on the channel
+            await asyncio.gather(self.close_when_done(producers), *consumers)
+        finally:
+            for task in producers + consumers:
+                task.cancel()
+            await asyncio.gather(*producers, *consumers, return_exceptions=True)
+
+    def verify(self) -> bool:
+        print_section_header("Verification Results")
+        success = self.produced == self.consumed and self.channel.qsize() == 0
+        mark = "O" if success else "X"
+        print(f"{mark} Items produced: {self.produced:,}, consumed: {self.consumed:,}")
+
+        print("\n" + "=" * 60)
+        print("!!! Data Transfer Complete !!!" if success else "!!! Data Transfer Failed !!!")
+        print("=" * 60)
+        return success
+
+
+async def demo(producers, consumers, items_per_producer, delay):
+    sources = [iterate(range(p * items_per_producer, (p + 1) * items_per_producer), delay) for p in range(producers)]
+    sinks = [ListSink(delay) for _ in range(consumers)]
+    pc = AsyncProducerConsumer(sources, sinks, declared_size=producers * items_per_producer)
+
+    start = time.perf_counter()
+    await pc.run()
+    elapsed = time.perf_counter() - start
+
+    success = pc.verify()
+    received = sorted(item for sink in sinks for item in sink.items)
+    print(f"All items delivered once: {received == list(range(producers * items_per_producer))}")
+    print(f"Elapsed: {elapsed * 1000:.1f} ms ({pc.consumed / elapsed:,.0f} items/s)")
+    return success
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Asyncio producer-consumer with many tasks on one thread")
+    parser.add_argument('--producers', type=int, default=1000)
+    parser.add_argument('--consumers', type=int, default=1000)
+    parser.add_argument('--items-per-producer', type=int, default=100)
+    parser.add_argument('--delay', type=float, default=0.0, help="simulated I/O wait per item, in seconds")
+    args = parser.parse_args(argv)
+
+    print_section_header("Producer-Consumer Problem (asyncio)")
+    asyncio.run(demo(args.producers, args.consumers, args.items_per_producer, args.delay))
+
+
+if __name__ == "__main__":
+    main()
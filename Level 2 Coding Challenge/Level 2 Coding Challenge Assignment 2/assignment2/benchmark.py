@@ -0,0 +1,175 @@
+import argparse
+import io
+import queue
+import threading
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+
+from Asgn_2 import BatchQueue, ProducerConsumer, RingBuffer, print_section_header
+from typed_transfer import TypedProducerConsumer, to_typed
+
+CHANNELS = {
+    'queue.Queue': queue.Queue,
+    'BatchQueue': BatchQueue,
+    'RingBuffer': RingBuffer
+}
+
+# Helper Functions
+
+def mixed_source(items):
+    # Alternating ints and floats, like the source container in main()
+    return [i if i % 2 == 0 else i + 0.5 for i in range(items)]
+
+def time_transfer(source, repeat=3, make=ProducerConsumer, **options):
+    timings = []
+    for _ in range(repeat):
+        with redirect_stdout(io.StringIO()):
+            pc = make(source, **options)
+            start = time.perf_counter()
+            pc.run()
+            elapsed = time.perf_counter() - start
+            success = pc.verify()
+        if not success:
+            raise RuntimeError(f"Transfer with {options} failed verification")
+        timings.append(elapsed)
+    return min(timings)
+
+def time_channel(make_channel, source, capacity, batch_size=None):
+    # One producer and one consumer thread moving source through the bare channel
+    channel = make_channel(capacity)
+    received = []
+
+    def consume():
+        remaining = len(source)
+        if batch_size:
+            while remaining:
+                items = channel.get_many(batch_size)
+                received.extend(items)
+                remaining -= len(items)
+        else:
+            get, append = channel.get, received.append
+            for _ in range(remaining):
+                append(get())
+
+    consumer = threading.Thread(target=consume)
+    start = time.perf_counter()
+    consumer.start()
+    if batch_size:
+        for offset in range(0, len(source), batch_size):
+            channel.put_many(source[offset:offset + batch_size])
+    else:
+        put = channel.put
+        for item in source:
+            put(item)
+    consumer.join()
+    elapsed = time.perf_counter() - start
+
+    if received != source:
+        raise RuntimeError(f"{make_channel.__name__} lost or reordered items")
+    return elapsed
+
+
+def benchmark_batch_sizes(items=1_000_000, batch_sizes=(1, 10, 100, 1000, 10000), repeat=3):
+    source = mixed_source(items)
+    results = []
+
+    print_section_header("Batched Transfer Throughput")
+    print(f"Items: {items:,}")
+    for batch_size in batch_sizes:
+        seconds = time_transfer(source, repeat, batch_size=batch_size)
+        results.append({'batch_size': batch_size, 'seconds': seconds, 'items_per_sec': items / seconds})
+        print(f"batch_size={batch_size:>6}: {seconds * 1000:9.1f} ms ({items / seconds:,.0f} items/s)")
+    return results
+
+def benchmark_workers(items=1_000_000, worker_counts=((1, 1), (2, 2), (4, 4), (8, 8)), batch_size=1000, repeat=3):
+    source = mixed_source(items)
+    results = []
+
+    print_section_header("Producer/Consumer Scaling")
+    print(f"Items: {items:,}, batch size: {batch_size}")
+    for producers, consumers in worker_counts:
+        seconds = time_transfer(source, repeat, batch_size=batch_size, producers=producers, consumers=consumers)
+        results.append({'producers': producers, 'consumers': consumers,
+                        'seconds': seconds, 'items_per_sec': items / seconds})
+        print(f"producers={producers:>2} consumers={consumers:>2}: {seconds * 1000:9.1f} ms "
+              f"({items / seconds:,.0f} items/s)")
+    return results
+
+def benchmark_channels(items=1_000_000, batch_sizes=(1, 1000), repeat=3):
+    source = mixed_source(items)
+    capacity = max(items // 2, 1)
+    results = []
+
+    print_section_header("Channel Microbenchmark (1 producer, 1 consumer)")
+    print(f"Items: {items:,}, capacity: {capacity:,}")
+    for batch_size in batch_sizes:
+        for name, make_channel in CHANNELS.items():
+            if batch_size > 1 and not hasattr(make_channel, 'put_many'):
+                continue
+            seconds = min(time_channel(make_channel, source, capacity, batch_size if batch_size > 1 else None)
+                          for _ in range(repeat))
+            results.append({'channel': name, 'batch_size': batch_size, 'seconds': seconds,
+                            'items_per_sec': items / seconds})
+            print(f"{name:>12} batch_size={batch_size:>6}: {seconds * 1000:9.1f} ms ({items / seconds:,.0f} items/s)")
+    return results
+
+def peak_transfer_memory(make, source, **options):
+    # Peak bytes allocated by the container setup and the transfer, source excluded
+    with redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        pc = make(source, **options)
+        pc.run()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak
+
+def benchmark_typed(items=1_000_000, batch_size=65536, repeat=3):
+    source = mixed_source(items)
+    words, tags = to_typed(source)
+    results = []
+
+    print_section_header("Typed Buffers vs Python Lists")
+    print(f"Items: {items:,}, batch size: {batch_size:,}")
+    for name, make, payload, options in (
+        ('list', ProducerConsumer, source, {'batch_size': batch_size}),
+        ('typed', TypedProducerConsumer, words, {'tags': tags, 'batch_size': batch_size})
+    ):
+        seconds = time_transfer(payload, repeat, make, **options)
+        peak = peak_transfer_memory(make, payload, **options)
+        results.append({'path': name, 'seconds': seconds, 'items_per_sec': items / seconds,
+                        'peak_bytes': peak, 'bytes_per_item': peak / items})
+        print(f"{name:>6}: {seconds * 1000:9.1f} ms ({items / seconds:,.0f} items/s), "
+              f"peak {peak / 2**20:,.1f} MiB ({peak / items:.1f} bytes/item)")
+    return results
+
+
+def parse_worker_count(value):
+    # "4x2" -> 4 producers, 2 consumers; "4" -> 4 of each
+    producers, _, consumers = value.partition('x')
+    return int(producers), int(consumers or producers)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the producer-consumer transfer")
+    parser.add_argument('--items', type=float, default=1e6, help="number of items to transfer")
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 10, 100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--workers', type=parse_worker_count, nargs='+', metavar='NxM',
+                        help="instead, time N producers x M consumers for each NxM given (batch size: first --batch-sizes)")
+    parser.add_argument('--channels', action='store_true',
+                        help="instead, compare the bare queue.Queue, BatchQueue and RingBuffer channels")
+    parser.add_argument('--typed', action='store_true',
+                        help="instead, compare the list path with the zero-copy typed buffer path")
+    args = parser.parse_args(argv)
+
+    if args.typed:
+        benchmark_typed(int(args.items), args.batch_sizes[-1], args.repeat)
+    elif args.channels:
+        benchmark_channels(int(args.items), args.batch_sizes, args.repeat)
+    elif args.workers:
+        benchmark_workers(int(args.items), args.workers, args.batch_sizes[0], args.repeat)
+    else:
+        benchmark_batch_sizes(int(args.items), args.batch_sizes, args.repeat)
+
+if __name__ == "__main__":
+    main()
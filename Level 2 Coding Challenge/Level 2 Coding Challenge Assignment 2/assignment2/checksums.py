@@ -0,0 +1,176 @@
+import pickle
+from array import array
+from hashlib import blake2b
+from itertools import repeat
+
+# Digests are sums of 64-bit segment hashes, compared modulo 2**64
+MASK = (1 << 64) - 1
+
+# Type tags for the per-item multiset hash, so 1 and 1.0 count as different items
+INT_TAG, FLOAT_TAG = 1, 2
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+# Bisection splits a differing range this many ways, and compares items directly below LEAF_SIZE
+FANOUT = 64
+LEAF_SIZE = 256
+
+# Helper Functions
+
+def encode(items):
+    # Canonical bytes: pickle writes ints and floats exactly and tags their type, so 1, 1.0, -0.0
+    # and -1/-2 (whose built-in hash() collides) all encode differently. The C pickler is as fast as
+    # hashing a tuple.
+    return pickle.dumps(items if type(items) is list else list(items), protocol=5)
+
+def digest64(data):
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'little')
+
+def content_hash(items):
+    return digest64(encode(items))
+
+def keyed_hash(start, content):
+    # The segment's position and content together, for the order-sensitive digest
+    return digest64(start.to_bytes(8, 'little') + content.to_bytes(8, 'little'))
+
+def word_hashes(tag, code, values):
+    # hash() is exact on 32-bit ints, so hashing (tag, low word, high word) tuples only collides by
+    # chance, unlike hash() of the values themselves (-1/-2, 0/2**61-1); arrays split them in C
+    words = iter(memoryview(array(code, values)).cast('B').cast('I'))
+    return sum(map(hash, zip(repeat(tag), words, words)))
+
+def multiset_hash(items):
+    # One hash per item, summed: the same total whatever order the items are in, within a segment
+    # or across segments
+    ints = [item for item in items if type(item) is int]
+    floats = [item for item in items if type(item) is float]
+    total = word_hashes(FLOAT_TAG, 'd', floats) if floats else 0
+    if ints:
+        try:
+            total += word_hashes(INT_TAG, 'q', ints)
+        except OverflowError:
+            small = [item for item in ints if INT64_MIN <= item <= INT64_MAX]
+            total += word_hashes(INT_TAG, 'q', small) if small else 0
+            total += sum(digest64(encode((item,))) for item in ints if not INT64_MIN <= item <= INT64_MAX)
+    if len(ints) + len(floats) < len(items):
+        total += sum(digest64(encode((item,))) for item in items if type(item) not in (int, float))
+    return total
+
+def same_item(a, b):
+    # Equal canonical encodings, matching the checksums
+    return a is b or encode((a,)) == encode((b,))
+
+def bisect_mismatches(size, chunk_differs, item_differs, max_show=5, fanout=FANOUT, leaf_size=LEAF_SIZE):
+    # Chunked bisection: split a differing range fanout ways and only descend into chunks that
+    # differ; small ranges are compared item by item
+    found = []
+
+    def visit(start, end):
+        if len(found) >= max_show:
+            return
+        if end - start <= leaf_size:
+            found.extend(i for i in range(start, end) if item_differs(i))
+            return
+        step = -(-(end - start) // fanout)
+        for chunk_start in range(start, end, step):
+            chunk_end = min(end, chunk_start + step)
+            if chunk_differs(chunk_start, chunk_end):
+                visit(chunk_start, chunk_end)
+
+    visit(0, size)
+    return found[:max_show]
+
+def locate_mismatches(source, destination, max_show=5, fanout=FANOUT, leaf_size=LEAF_SIZE):
+    def chunk_differs(start, end):
+        return content_hash(source[start:end]) != content_hash(destination[start:end])
+
+    def item_differs(i):
+        return i >= len(source) or i >= len(destination) or not same_item(source[i], destination[i])
+
+    return bisect_mismatches(max(len(source), len(destination)), chunk_differs, item_differs,
+                             max_show, fanout, leaf_size)
+
+def checksum_checks(expected_count, destination_size, sent, written, landed, multisets):
+    # Same checks and messages as verify_containers. sent is what producers queued, written what
+    # consumers stored, and landed the destination as it is now, re-read over the sent segments.
+    # multisets() gives the per-item multiset hashes of the source and the destination over those
+    # segments; it is only called when the order digests differ, to tell a reorder from lost items.
+    checks = []
+
+    length_match = destination_size == expected_count
+    checks.append(("Length match", length_match,
+                   f"{expected_count} elements" if length_match else
+                   f"Source: {expected_count}, Destination: {destination_size}"))
+
+    order_preserved = (sent.count == landed.count
+                       and sent.ordered & MASK == written.ordered & MASK == landed.ordered & MASK)
+    checks.append(("Elements in order", order_preserved,
+                   "All correct" if order_preserved else "Mismatches found"))
+
+    if order_preserved:
+        same_items = True
+    else:
+        queued, stored = multisets()
+        same_items = queued & MASK == stored & MASK
+    all_present = sent.count == written.count == expected_count and same_items
+    checks.append(("All elements present", all_present,
+                   "Complete" if all_present else "Missing or duplicated"))
+
+    passed = [c for c in checks if c[1]]
+    failed = [c for c in checks if not c[1]]
+
+    return all(c[1] for c in checks), checks, passed, failed
+
+
+# Incremental checksums over the segments a transfer moves. Producers and consumers hash the same
+# queued segments, and both sums are commutative, so each worker keeps its own checksum and they
+# are merged at the end, whatever order the segments arrived in. Workers leave out the per-item
+# multiset hash (multiset=False), which costs several times the segment hash; verification only
+# computes it, re-reading the source and the destination, when the order digests differ.
+
+class TransferChecksum:
+    def __init__(self, multiset=True):
+        self.count = 0
+        self.ordered = 0      # sum of keyed_hash(start, content): changes if a segment lands elsewhere
+        self.unordered = 0    # sum of per-item hashes: the multiset of items, positions ignored
+        self.spans = []       # (start, length) of every segment, so the same segments can be re-read
+        self.multiset = multiset
+
+    def add_segment(self, start, items):
+        self.count += len(items)
+        self.ordered += keyed_hash(start, content_hash(items))
+        if self.multiset:
+            self.unordered += multiset_hash(items)
+        self.spans.append((start, len(items)))
+
+    def add_pair(self, index, item):
+        self.add_segment(index, (item,))
+
+    def merge(self, other):
+        self.count += other.count
+        self.ordered += other.ordered
+        self.unordered += other.unordered
+        self.spans.extend(other.spans)
+        return self
+
+    def digest(self):
+        return self.count, self.ordered & MASK, self.unordered & MASK
+
+    def reread(self, container, multiset=True):
+        # Checksum of container over the same segments, read as it is now: one hashing pass
+        checksum = TransferChecksum(multiset)
+        for start, length in self.spans:
+            checksum.add_segment(start, container[start:start + length])
+        return checksum
+
+    @classmethod
+    def combine(cls, checksums):
+        total = cls()
+        for checksum in checksums:
+            total.merge(checksum)
+        return total
+
+    @classmethod
+    def of(cls, container, multiset=True):
+        checksum = cls(multiset)
+        checksum.add_segment(0, container)
+        return checksum
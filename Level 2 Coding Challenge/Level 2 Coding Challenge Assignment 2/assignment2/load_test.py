@@ -0,0 +1,82 @@
+import argparse
+import io
+import json
+from contextlib import redirect_stdout
+
+from Asgn_2 import ProducerConsumer, print_section_header
+from benchmark import mixed_source, parse_worker_count
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+# Queue capacities in items; None is the default of half the source
+CAPACITIES = (64, 4096, None)
+WORKERS = ((1, 1), (2, 2), (4, 4))
+
+# Helper Functions
+
+def parse_capacity(value):
+    # "half" -> half the source (the default), otherwise a number of items; 0 means unbounded
+    return None if value == 'half' else int(float(value))
+
+def load_run(source, capacity, producers, consumers, batch_size, samples=False):
+    with redirect_stdout(io.StringIO()):
+        pc = ProducerConsumer(source, batch_size, producers, consumers, queue_capacity=capacity, metrics=True)
+        pc.run()
+        success = pc.verify()
+    if not success:
+        raise RuntimeError(f"Transfer of {len(source):,} items with capacity {capacity}, "
+                           f"{producers}x{consumers} workers failed verification")
+
+    report = pc.metrics.report(samples)
+    report['source_size'] = len(source)
+    report['batch_size'] = batch_size
+    return report
+
+def format_row(report):
+    latency = report['latency_seconds']
+    return (f"{report['source_size']:>10,} {report['queue_capacity']:>9,} "
+            f"{report['producers']:>2}x{report['consumers']:<2} {report['elapsed_seconds']:8.3f} "
+            f"{report['items_per_sec']:>12,.0f} {latency['p50'] * 1000:8.2f} {latency['p99'] * 1000:8.2f} "
+            f"{report['producer_blocked_on_full']['seconds']:8.3f} {report['consumer_blocked_on_empty']['seconds']:8.3f} "
+            f"{report['queue_depth']['max']:>9,}")
+
+
+def run_load_test(sizes=SIZES, capacities=CAPACITIES, workers=WORKERS, batch_size=1000, samples=False):
+    results = []
+
+    print_section_header("Load Test", width=104)
+    print(f"Batch size: {batch_size:,}; latency is enqueue-to-dequeue per item, blocked times are summed over workers")
+    print(f"{'items':>10} {'capacity':>9} {'PxC':<5} {'seconds':>8} {'items/s':>12} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'full s':>8} {'empty s':>8} {'max depth':>9}")
+    for size in sizes:
+        source = mixed_source(size)
+        for capacity in capacities:
+            for producers, consumers in workers:
+                report = load_run(source, capacity, producers, consumers, batch_size, samples)
+                results.append(report)
+                print(format_row(report))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep source size, queue capacity and worker counts with metrics on")
+    parser.add_argument('--sizes', type=float, nargs='+', default=SIZES, help="numbers of items to transfer")
+    parser.add_argument('--capacities', type=parse_capacity, nargs='+', default=CAPACITIES,
+                        help="queue capacities in items, or 'half' for half the source (0 is unbounded)")
+    parser.add_argument('--workers', type=parse_worker_count, nargs='+', default=WORKERS, metavar='NxM',
+                        help="N producers x M consumers for each NxM given")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--json', metavar='PATH', help="also write every run's metrics report to PATH")
+    parser.add_argument('--samples', action='store_true',
+                        help="include the queue depth time series in the JSON reports")
+    args = parser.parse_args(argv)
+
+    results = run_load_test([int(size) for size in args.sizes], args.capacities, args.workers,
+                            args.batch_size, args.samples)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'results': results}, file, indent=2)
+        print(f"\nWrote {len(results)} reports to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
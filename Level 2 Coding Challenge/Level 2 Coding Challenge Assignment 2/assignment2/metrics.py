@@ -0,0 +1,203 @@
+import json
+import math
+import threading
+import time
+
+# Histograms bucket by powers of two of this unit: 1 microsecond for waits and latencies
+BASE = 1e-6
+
+clock = time.perf_counter
+
+# Helper Functions
+
+def bucket_of(value, base=BASE):
+    # Bucket b holds values in (base * 2**(b-1), base * 2**b]; everything up to base lands in bucket 0
+    if value <= base:
+        return 0
+    mantissa, exponent = math.frexp(value / base)
+    return exponent - 1 if mantissa == 0.5 else exponent
+
+def lacks_room(channel, count):
+    # True if putting count items would have to wait for a consumer (maxsize 0 means unbounded)
+    return 0 < channel.maxsize < channel.qsize() + count
+
+
+# Log-bucketed histogram: constant memory and O(1) adds, percentiles to within a factor of two
+
+class Histogram:
+    def __init__(self, base=BASE):
+        self.base = base
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value, weight=1):
+        bucket = bucket_of(value, self.base)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + weight
+        self.count += weight
+        self.total += value * weight
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def upper_bound(self, bucket):
+        return self.base * 2 ** bucket
+
+    def percentile(self, percent):
+        # Upper bound of the bucket the percentile falls in, never above the largest value seen
+        if not self.count:
+            return None
+        rank = percent / 100 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(self.upper_bound(bucket), self.max)
+        return self.max
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'mean': self.mean(),
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99),
+            'buckets': [{'le': self.upper_bound(bucket), 'count': self.buckets[bucket]}
+                        for bucket in sorted(self.buckets)]
+        }
+
+
+# Counters owned by one producer or consumer thread, so recording takes no lock. A call counts as
+# blocked if the queue was full (for a put) or empty (for a get) when the worker made it.
+# Consumers also record the queue depth they saw, which no sampling interval can miss.
+
+class WorkerMetrics:
+    def __init__(self, stamps=None):
+        self.items = 0
+        self.calls = 0
+        self.blocked = 0.0
+        self.blocked_calls = 0
+        self.latency = Histogram()    # enqueue-to-dequeue, recorded by consumers, weighted per item
+        self.depth = Histogram(base=1)
+        self.stamps = stamps
+
+    def record(self, items, waited, seconds):
+        self.items += items
+        self.calls += 1
+        if waited:
+            self.blocked += seconds
+            self.blocked_calls += 1
+
+    def received(self, key, items, depth, began):
+        # The channel stamped the entry under its key when it was queued
+        now = clock()
+        self.record(items, not depth, now - began)
+        self.depth.add(depth)
+        self.latency.add(now - self.stamps.pop(key), items)
+
+    def to_dict(self):
+        return {'items': self.items, 'calls': self.calls,
+                'blocked_seconds': self.blocked, 'blocked_calls': self.blocked_calls}
+
+
+# Metrics for one transfer: per-worker counters merged at the end, plus a sampler thread that
+# records queue depth and items consumed over time while run() is going, for a time series
+
+class TransferMetrics:
+    def __init__(self, channel, producers=1, consumers=1, sample_interval=0.001):
+        self.channel = channel
+        # Turns on enqueue timestamps in the channel, keyed by each entry's index or segment start
+        channel.stamps = {}
+        self.producers = [WorkerMetrics() for _ in range(producers)]
+        self.consumers = [WorkerMetrics(channel.stamps) for _ in range(consumers)]
+        self.sample_interval = sample_interval
+        self.samples = []     # (seconds since start, queue depth, items consumed so far)
+        self.started = None
+        self.finished = None
+        self.stopping = threading.Event()
+        self.sampler = None
+
+    def consumed(self):
+        return sum(worker.items for worker in self.consumers)
+
+    def sample(self):
+        self.samples.append((clock() - self.started, self.channel.qsize(), self.consumed()))
+
+    def sample_depth(self):
+        while not self.stopping.wait(self.sample_interval):
+            self.sample()
+
+    def start(self):
+        self.started = clock()
+        self.sample()
+        self.sampler = threading.Thread(target=self.sample_depth, name="Metrics", daemon=True)
+        self.sampler.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.sampler.join()
+        self.finished = clock()
+        self.sample()
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or clock()) - self.started
+
+    def items_per_sec(self):
+        elapsed = self.elapsed()
+        return self.consumed() / elapsed if elapsed else 0.0
+
+    def latency(self):
+        histogram = Histogram()
+        for worker in self.consumers:
+            histogram.merge(worker.latency)
+        return histogram
+
+    def depth(self):
+        histogram = Histogram(base=1)
+        for worker in self.consumers:
+            histogram.merge(worker.depth)
+        return histogram
+
+    def blocked(self, workers):
+        return {'seconds': sum(worker.blocked for worker in workers),
+                'calls': sum(worker.blocked_calls for worker in workers),
+                'per_worker': [worker.to_dict() for worker in workers]}
+
+    def report(self, samples=True):
+        report = {
+            'items': self.consumed(),
+            'elapsed_seconds': self.elapsed(),
+            'items_per_sec': self.items_per_sec(),
+            'queue_capacity': self.channel.maxsize,
+            'producers': len(self.producers),
+            'consumers': len(self.consumers),
+            'producer_blocked_on_full': self.blocked(self.producers),
+            'consumer_blocked_on_empty': self.blocked(self.consumers),
+            'latency_seconds': self.latency().to_dict(),
+            'queue_depth': self.depth().to_dict()
+        }
+        if samples:
+            report['queue_depth']['samples'] = [list(sample) for sample in self.samples]
+        return report
+
+    def to_json(self, samples=True, **options):
+        return json.dumps(self.report(samples), **options)
@@ -0,0 +1,260 @@
+import argparse
+import multiprocessing
+from functools import partial
+from multiprocessing import connection, shared_memory
+from typing import Callable, List, Optional, Union
+
+from Asgn_2 import EMPTY_SLOT, ProducerConsumer, print_completion, print_section_header
+from checksums import TransferChecksum
+
+# Word-sized regions first so every int64/float64 view stays 8-byte aligned
+REGIONS = (
+    ('control', 'q'), ('source', 'q'), ('ring', 'q'), ('destination', 'q'),
+    ('source_tags', 'b'), ('ring_tags', 'b'), ('destination_tags', 'b')
+)
+ITEM_SIZES = {'q': 8, 'b': 1}
+
+# Slots of the control region
+HEAD, TAIL, CLOSED = 0, 1, 2
+
+# Type tags: each 8-byte word holds an int64 or the bits of a float64
+INT_TAG, FLOAT_TAG = 0, 1
+
+# Helper Functions
+
+def region_lengths(size, slots):
+    return {
+        'control': 3, 'source': size, 'ring': slots, 'destination': size,
+        'source_tags': size, 'ring_tags': slots, 'destination_tags': size
+    }
+
+def as_floats(words):
+    # The same 8-byte words, read as float64 instead of int64
+    return words.cast('B').cast('d')
+
+def encode_numbers(numbers, words, tags):
+    floats = as_floats(words)
+    try:
+        for i, number in enumerate(numbers):
+            if isinstance(number, float):
+                floats[i] = number
+                tags[i] = FLOAT_TAG
+            else:
+                # Ints outside int64 raise ValueError here, before any process starts
+                words[i] = number
+                tags[i] = INT_TAG
+    finally:
+        floats.release()
+
+def decode_numbers(words, tags, start, end):
+    ints = words[start:end].tolist()
+    floats = as_floats(words)[start:end].tolist()
+    return [number if tag == FLOAT_TAG else integer
+            for integer, number, tag in zip(ints, floats, tags[start:end].tolist())]
+
+def ring_segments(position, count, slots):
+    # Ring offsets covering count slots from position, split in two where the ring wraps
+    start = position % slots
+    first = min(count, slots - start)
+    segments = [(start, start + first)]
+    if count > first:
+        segments.append((0, count - first))
+    return segments
+
+def spin(number, iterations):
+    # Stand-in for CPU-bound per-item work
+    total = 0
+    for i in range(iterations):
+        total += i * i
+    return total + number
+
+
+# One shared memory segment holding the encoded source, the ring buffer and the destination
+
+class SharedSegment:
+    def __init__(self, size, slots, name=None):
+        self.size = size
+        self.slots = slots
+        lengths = region_lengths(size, slots)
+        total = sum(lengths[region] * ITEM_SIZES[fmt] for region, fmt in REGIONS)
+        self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=total)
+
+        self.views = {}
+        offset = 0
+        for region, fmt in REGIONS:
+            nbytes = lengths[region] * ITEM_SIZES[fmt]
+            self.views[region] = self.shm.buf[offset:offset + nbytes].cast(fmt)
+            offset += nbytes
+
+    @property
+    def spec(self):
+        return self.size, self.slots, self.shm.name
+
+    def close(self):
+        # Views must be released before the mapping can be closed
+        for view in self.views.values():
+            view.release()
+        self.views = {}
+        self.shm.close()
+
+
+def produce_batches(views, size, slots, batch_size, condition):
+    control = views['control']
+    while control[HEAD] < size:
+        with condition:
+            condition.wait_for(lambda: control[HEAD] - control[TAIL] < slots)
+            head = control[HEAD]
+            count = min(batch_size, slots - (head - control[TAIL]), size - head)
+
+            # A single producer enqueues in source order, so a ring sequence number is also the source index
+            sequence = head
+            for start, end in ring_segments(head, count, slots):
+                stop = sequence + end - start
+                views['ring'][start:end] = views['source'][sequence:stop]
+                views['ring_tags'][start:end] = views['source_tags'][sequence:stop]
+                sequence = stop
+
+            control[HEAD] = head + count
+            condition.notify_all()
+
+    with condition:
+        control[CLOSED] = 1
+        condition.notify_all()
+
+def consume_batches(views, slots, batch_size, condition, work):
+    control = views['control']
+    while True:
+        with condition:
+            condition.wait_for(lambda: control[HEAD] > control[TAIL] or control[CLOSED])
+            tail = control[TAIL]
+            count = min(batch_size, control[HEAD] - tail)
+            if count == 0:
+                return
+
+            # Slots are copied out under the lock, before the producer may reuse them
+            sequence = tail
+            for start, end in ring_segments(tail, count, slots):
+                stop = sequence + end - start
+                views['destination'][sequence:stop] = views['ring'][start:end]
+                views['destination_tags'][sequence:stop] = views['ring_tags'][start:end]
+                sequence = stop
+
+            control[TAIL] = tail + count
+            condition.notify_all()
+
+        # The per-item work runs outside the lock, in parallel across consumer processes
+        if work is not None:
+            for number in decode_numbers(views['destination'], views['destination_tags'], tail, tail + count):
+                work(number)
+
+def ring_producer(spec, batch_size, condition):
+    segment = SharedSegment(*spec)
+    try:
+        produce_batches(segment.views, segment.size, segment.slots, batch_size, condition)
+    finally:
+        segment.close()
+
+def ring_consumer(spec, batch_size, condition, work):
+    segment = SharedSegment(*spec)
+    try:
+        consume_batches(segment.views, segment.slots, batch_size, condition, work)
+    finally:
+        segment.close()
+
+
+# Same interface as ProducerConsumer, but consumers are processes fed through a shared memory ring
+
+class ProcessProducerConsumer(ProducerConsumer):
+    def __init__(self, source_data: List[Union[int, float]], consumers: int = 2, batch_size: int = 1024,
+                 work: Optional[Callable[[Union[int, float]], object]] = None):
+        # Task 1: Source container with integers and doubles
+        self.source_container = source_data.copy()
+        source_capacity = len(self.source_container)
+
+        # Task 2: Destination container with same capacity
+        self.destination_container = [EMPTY_SLOT] * source_capacity
+
+        # Task 3: Ring with half the capacity of source (maxsize 0 means unbounded for queue.Queue,
+        # so tiny sources get a ring as large as the source instead)
+        self.queue_capacity = source_capacity // 2
+        self.ring_slots = self.queue_capacity or max(source_capacity, 1)
+
+        if batch_size < 1:
+            raise ValueError("Need a positive batch size")
+        # One producer process, and no thread channel: the ring lives in the shared segment, so there is
+        # no shared_queue and TransferMetrics (which instruments thread channels) stays off
+        self.init_workers(source_capacity, None, 'shared memory', batch_size, 1, consumers)
+        # Called on every item inside the consumer processes; must be picklable under spawn
+        self.work = work
+
+        print("Initialized:")
+        print(f"  Source capacity: {source_capacity}")
+        print(f"  Queue capacity: {self.queue_capacity}")
+        print(f"  Consumer processes: {consumers}, batch size: {batch_size}")
+        print(f"  Source data: {self._format_list_preview(self.source_container)}")
+
+    def run(self):
+        size = len(self.source_container)
+        segment = SharedSegment(size, self.ring_slots)
+        try:
+            encode_numbers(self.source_container, segment.views['source'], segment.views['source_tags'])
+
+            condition = multiprocessing.Condition()
+            consumers = [
+                multiprocessing.Process(target=ring_consumer, name=self.actor_name("Consumer", i),
+                                        args=(segment.spec, self.batch_size, condition, self.work))
+                for i in range(self.consumers)
+            ]
+            producer = multiprocessing.Process(target=ring_producer, name="Producer",
+                                               args=(segment.spec, self.batch_size, condition))
+            processes = consumers + [producer]
+            for process in processes:
+                process.start()
+            self.join_processes(processes)
+
+            self.destination_container = decode_numbers(segment.views['destination'],
+                                                        segment.views['destination_tags'], 0, size)
+            # Checksummed once in the parent, over the source and what came back through shared memory
+            self.producer_checksums = [TransferChecksum.of(self.source_container, multiset=False)]
+            self.consumer_checksums = [TransferChecksum.of(self.destination_container, multiset=False)]
+        finally:
+            segment.close()
+            segment.shm.unlink()
+
+    def join_processes(self, processes):
+        # Wake on process exit; if one worker dies the others would wait on the ring forever
+        running = list(processes)
+        while running:
+            finished = connection.wait([process.sentinel for process in running])
+            for process in [process for process in running if process.sentinel in finished]:
+                process.join()
+                running.remove(process)
+                if process.exitcode != 0:
+                    for other in running:
+                        other.terminate()
+                        other.join()
+                    raise RuntimeError(f"{process.name} exited with code {process.exitcode}")
+                print_completion(process.name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Producer-consumer transfer with consumer processes")
+    parser.add_argument('--items', type=float, default=100_000, help="number of items to transfer")
+    parser.add_argument('--consumers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--batch-size', type=int, default=1024)
+    parser.add_argument('--spin', type=int, default=0, help="CPU-bound work per item, in loop iterations")
+    args = parser.parse_args(argv)
+
+    source_data = [i if i % 2 == 0 else i + 0.5 for i in range(int(args.items))]
+    work = partial(spin, iterations=args.spin) if args.spin else None
+
+    print_section_header("Producer-Consumer Problem (process backend)")
+
+    pc = ProcessProducerConsumer(source_data, args.consumers, args.batch_size, work)
+    pc.run()
+    pc.verify()
+    pc.display_summary()
+
+
+if __name__ == "__main__":
+    main()
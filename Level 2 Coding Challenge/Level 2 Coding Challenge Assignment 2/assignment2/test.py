@@ -1,8 +1,35 @@
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
 import unittest
+from array import array
 import sys
 import io
+import queue
+import threading
+import time
 from contextlib import redirect_stdout
-from Asgn_2 import ProducerConsumer, verify_containers
+from unittest import mock
+from Asgn_2 import BatchQueue, ProducerConsumer, QueueClosed, RingBuffer, verify_containers
+from checksums import TransferChecksum, locate_mismatches, multiset_hash
+from metrics import Histogram, bucket_of
+from load_test import main as load_test_main, run_load_test
+from async_pipeline import AsyncChannel, AsyncProducerConsumer, ChannelClosed, ListSink, iterate
+from process_backend import ProcessProducerConsumer, ring_segments
+from typed_transfer import SegmentQueue, TypedProducerConsumer, to_typed
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def reject_negative(number):
+    """Per-item work for the process backend that fails on negative input"""
+    if number < 0:
+        raise ValueError(number)
 
 
 class TestProducerConsumer(unittest.TestCase):
@@ -294,6 +321,848 @@ class TestEdgeCases(unittest.TestCase):
         print("✓ Test passed: Order preservation")
 
 
+class TestBatchedMode(unittest.TestCase):
+    """Tests for the batched performance mode"""
+    
+    def run_batched(self, source_data, batch_size):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc = ProducerConsumer(source_data, batch_size=batch_size)
+            pc.run()
+            success = pc.verify()
+        return pc, output.getvalue(), success
+    
+    def test_batched_transfer_preserves_order(self):
+        """Batched transfer keeps order and int/float types for several batch sizes"""
+        print("\n=== Batched: Order preservation ===")
+        source_data = [1, 2.5, 3, 4.7, 5, 6.3, 7, 8.9, 9, 10.1, 11]
+        
+        for batch_size in (1, 3, 5, 100):
+            pc, _, success = self.run_batched(source_data, batch_size)
+            self.assertTrue(success, f"Verification should pass for batch size {batch_size}")
+            self.assertEqual(pc.destination_container, source_data)
+            self.assertEqual([type(x) for x in pc.destination_container], [type(x) for x in source_data])
+            self.assertEqual(pc.shared_queue.maxsize, 5, "Queue size should still be 11 // 2 = 5")
+        print("✓ Test passed: Batched order preservation")
+    
+    def test_batched_edge_sizes(self):
+        """Empty, single-element and two-element sources in batched mode"""
+        print("\n=== Batched: Edge sizes ===")
+        for source_data in ([], [42.5], [1.5, 2.5]):
+            pc, _, success = self.run_batched(source_data, 4)
+            self.assertTrue(success)
+            self.assertEqual(pc.destination_container, source_data)
+        print("✓ Test passed: Batched edge sizes")
+    
+    def test_batched_large_transfer_without_per_item_logging(self):
+        """A large batched transfer completes and prints no per-item status lines"""
+        print("\n=== Batched: Large transfer ===")
+        source_data = [i * 0.5 if i % 2 else i for i in range(200_000)]
+        
+        pc, output, success = self.run_batched(source_data, 1000)
+        
+        self.assertTrue(success, "Verification should pass")
+        self.assertEqual(pc.destination_container, source_data)
+        self.assertNotIn("Produced", output)
+        self.assertNotIn("Consumed", output)
+        print("✓ Test passed: Batched large transfer")
+    
+    def test_batch_queue_respects_capacity(self):
+        """put_many never holds more than maxsize items and get_many returns at most max_items"""
+        print("\n=== Batched: BatchQueue capacity ===")
+        shared_queue = BatchQueue(maxsize=3)
+        received, sizes = [], []
+        
+        def consume():
+            while len(received) < 10:
+                sizes.append(shared_queue.qsize())
+                items = shared_queue.get_many(2, timeout=1)
+                self.assertLessEqual(len(items), 2)
+                received.extend(items)
+                shared_queue.task_done_many(len(items))
+        
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        shared_queue.put_many(list(range(10)))
+        consumer.join()
+        
+        self.assertEqual(received, list(range(10)))
+        self.assertLessEqual(max(sizes), 3)
+        self.assertEqual(shared_queue.unfinished_tasks, 0)
+        with self.assertRaises(queue.Empty):
+            shared_queue.get_many(5, block=False)
+        shared_queue.put_many([1, 2, 3])
+        with self.assertRaises(queue.Full):
+            shared_queue.put_many([4], timeout=0.01)
+        print("✓ Test passed: BatchQueue capacity")
+
+
+class TestMultiProducerConsumer(unittest.TestCase):
+    """Tests for N producers / M consumers writing into preallocated slots"""
+    
+    def run_workers(self, source_data, producers, consumers, batch_size=None):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc = ProducerConsumer(source_data, batch_size=batch_size, producers=producers, consumers=consumers)
+            pc.run()
+            success = pc.verify()
+        return pc, output.getvalue(), success
+    
+    def test_partitions_cover_source(self):
+        """Producer partitions are contiguous, disjoint and cover every index"""
+        print("\n=== Multi: Partitions ===")
+        for size, producers in ((10, 3), (7, 7), (3, 5), (0, 2)):
+            with redirect_stdout(io.StringIO()):
+                pc = ProducerConsumer(list(range(size)), producers=producers)
+            covered = [i for start, end in pc.partitions for i in range(start, end)]
+            self.assertEqual(covered, list(range(size)))
+            self.assertEqual(len(pc.partitions), producers)
+        print("✓ Test passed: Partitions")
+    
+    def test_multiple_workers_preserve_order(self):
+        """Per-item mode with several producers and consumers keeps order and types"""
+        print("\n=== Multi: Per-item order preservation ===")
+        source_data = [1, 2.5, 3, 4.7, 5, 6.3, 7, 8.9, 9, 10.1, 11, 12.4, 13]
+        
+        pc, output, success = self.run_workers(source_data, 3, 2)
+        
+        self.assertTrue(success, "Verification should pass")
+        self.assertEqual(pc.destination_container, source_data)
+        self.assertEqual([type(x) for x in pc.destination_container], [type(x) for x in source_data])
+        self.assertEqual(pc.shared_queue.maxsize, 6, "Queue size should still be 13 // 2 = 6")
+        for actor in ("Producer-1", "Producer-3", "Consumer-2"):
+            self.assertIn(f"[{actor}] O Finished", output)
+        print("✓ Test passed: Per-item order preservation")
+    
+    def test_batched_workers_large_transfer(self):
+        """Batched mode with uneven worker counts transfers a large source in order"""
+        print("\n=== Multi: Batched large transfer ===")
+        source_data = [i * 0.5 if i % 2 else i for i in range(100_001)]
+        
+        for producers, consumers in ((4, 4), (1, 3), (5, 1)):
+            pc, _, success = self.run_workers(source_data, producers, consumers, batch_size=997)
+            self.assertTrue(success, f"Verification should pass for {producers}x{consumers}")
+            self.assertEqual(pc.destination_container, source_data)
+        print("✓ Test passed: Batched large transfer")
+    
+    def test_more_workers_than_items(self):
+        """Producers with empty partitions and idle consumers still finish"""
+        print("\n=== Multi: More workers than items ===")
+        for source_data in ([], [1.5], [1, 2.5, 3]):
+            pc, _, success = self.run_workers(source_data, 5, 4, batch_size=2)
+            self.assertTrue(success)
+            self.assertEqual(pc.destination_container, source_data)
+        print("✓ Test passed: More workers than items")
+    
+    def test_unfilled_slots_fail_verification(self):
+        """A slot no consumer wrote is reported as a missing element"""
+        print("\n=== Multi: Unfilled slots ===")
+        with redirect_stdout(io.StringIO()):
+            pc = ProducerConsumer([1, 2.5, 3, 4.7])
+            pc.destination_container[:3] = [1, 2.5, 3]
+            success = pc.verify()
+        self.assertFalse(success)
+        self.assertEqual(pc.filled_destination(), [1, 2.5, 3])
+        with self.assertRaises(ValueError):
+            ProducerConsumer([1, 2], consumers=0)
+        print("✓ Test passed: Unfilled slots")
+
+
+class TestRingBuffer(unittest.TestCase):
+    """Tests for the single-producer/single-consumer ring buffer channel"""
+    
+    def run_ring(self, source_data, batch_size=None):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc = ProducerConsumer(source_data, batch_size=batch_size, channel='ring')
+            pc.run()
+            success = pc.verify()
+        return pc, output.getvalue(), success
+    
+    def test_ring_transfer_with_notifications(self):
+        """Per-item ring transfer keeps order and still prints the full/empty notifications"""
+        print("\n=== Ring: Per-item transfer ===")
+        source_data = [1, 2.5, 3, 4.7, 5, 6.3, 7, 8.9, 9, 10.1]
+        
+        pc, output, success = self.run_ring(source_data)
+        
+        self.assertTrue(success, "Verification should pass")
+        self.assertEqual(pc.destination_container, source_data)
+        self.assertIsInstance(pc.shared_queue, RingBuffer)
+        self.assertEqual(pc.shared_queue.maxsize, 5, "Ring size should be 10 // 2 = 5")
+        self.assertIn("Queue is EMPTY", output)
+        print("✓ Test passed: Ring per-item transfer")
+    
+    def test_ring_batched_and_edge_sizes(self):
+        """Batched ring transfers, including sources too small for a half-size ring"""
+        print("\n=== Ring: Batched and edge sizes ===")
+        large = [i * 0.5 if i % 2 else i for i in range(100_001)]
+        for source_data, batch_size in (([], 4), ([42.5], 4), ([1.5, 2.5], None), (large, 333), (large, 1)):
+            pc, _, success = self.run_ring(source_data, batch_size)
+            self.assertTrue(success)
+            self.assertEqual(pc.destination_container, source_data)
+        print("✓ Test passed: Ring batched and edge sizes")
+    
+    def test_ring_respects_capacity_across_threads(self):
+        """A tiny ring wraps many times without losing, reordering or overfilling"""
+        print("\n=== Ring: Capacity across threads ===")
+        ring = RingBuffer(maxsize=3)
+        received, sizes = [], []
+        
+        def consume():
+            while len(received) < 5000:
+                sizes.append(ring.qsize())
+                if len(received) % 2:
+                    received.append(ring.get(timeout=5))
+                else:
+                    received.extend(ring.get_many(2, timeout=5))
+        
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        for start in range(0, 5000, 10):
+            if start % 20:
+                ring.put_many(list(range(start, start + 10)), timeout=5)
+            else:
+                for item in range(start, start + 10):
+                    ring.put(item, timeout=5)
+        consumer.join()
+        
+        self.assertEqual(received, list(range(5000)))
+        self.assertLessEqual(max(sizes), 3)
+        self.assertEqual(ring.slots, [None] * 3, "Taken slots should not keep references")
+        print("✓ Test passed: Ring capacity across threads")
+    
+    def test_ring_non_blocking_and_timeouts(self):
+        """Non-blocking calls raise at once and blocking calls honour their timeout"""
+        print("\n=== Ring: Non-blocking API ===")
+        ring = RingBuffer(maxsize=2)
+        with self.assertRaises(queue.Empty):
+            ring.get_nowait()
+        with self.assertRaises(queue.Empty):
+            ring.get_many(5, timeout=0.01)
+        ring.put_nowait(1)
+        ring.put(2.5)
+        self.assertTrue(ring.full())
+        with self.assertRaises(queue.Full):
+            ring.put_nowait(3)
+        with self.assertRaises(queue.Full):
+            ring.put(3, timeout=0.01)
+        self.assertEqual(ring.get_many(5), [1, 2.5])
+        self.assertTrue(ring.empty())
+        
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(ValueError):
+                ProducerConsumer([1, 2], producers=2, channel='ring')
+            with self.assertRaises(ValueError):
+                ProducerConsumer([1, 2], channel='pipe')
+        print("✓ Test passed: Ring non-blocking API")
+
+
+class TestEventDrivenShutdown(unittest.TestCase):
+    """Tests for close semantics and condition-based full/empty signalling"""
+    
+    def check_close_wakes_consumer(self, channel):
+        received, errors = [], []
+        
+        def consume():
+            try:
+                while True:
+                    received.append(channel.get())
+            except QueueClosed as error:
+                errors.append(error)
+        
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        channel.put_many([1, 2.5, 3])
+        channel.close()
+        consumer.join(timeout=1)
+        
+        self.assertFalse(consumer.is_alive(), "close() should wake a consumer blocked in get()")
+        self.assertEqual(received, [1, 2.5, 3], "Queued items are drained before QueueClosed")
+        self.assertEqual(len(errors), 1)
+        with self.assertRaises(QueueClosed):
+            channel.put(4)
+        with self.assertRaises(QueueClosed):
+            channel.get_many(5, block=False)
+    
+    def test_close_wakes_blocked_consumers(self):
+        """BatchQueue and RingBuffer both drain, then raise QueueClosed, after close()"""
+        print("\n=== Shutdown: close() semantics ===")
+        self.check_close_wakes_consumer(BatchQueue(maxsize=2))
+        self.check_close_wakes_consumer(RingBuffer(maxsize=2))
+        print("✓ Test passed: close() semantics")
+    
+    def test_full_and_empty_are_signalled(self):
+        """wait_until_full / wait_until_empty return as soon as the queue reaches that level"""
+        print("\n=== Shutdown: Full/empty signalling ===")
+        shared_queue = BatchQueue(maxsize=2)
+        self.assertTrue(shared_queue.wait_until_empty(timeout=0))
+        self.assertFalse(shared_queue.wait_until_full(timeout=0.01))
+        
+        filler = threading.Timer(0.02, shared_queue.put_many, args=([1, 2],))
+        filler.start()
+        self.assertTrue(shared_queue.wait_until_full(timeout=1))
+        
+        drainer = threading.Timer(0.02, shared_queue.get_many, args=(2,))
+        drainer.start()
+        self.assertTrue(shared_queue.wait_until_empty(timeout=1))
+        filler.join()
+        drainer.join()
+        self.assertEqual(shared_queue.level_waiters, 0)
+        print("✓ Test passed: Full/empty signalling")
+    
+    def test_notifications_come_from_level_signals(self):
+        """The FULL/EMPTY lines are raised by the put or get that reaches the level, on every channel"""
+        print("\n=== Shutdown: Notifications ===")
+        for channel in ('queue', 'ring'):
+            output = io.StringIO()
+            with redirect_stdout(output):
+                pc = ProducerConsumer([1, 2.5, 3, 4.7], channel=channel)
+                shared_queue = pc.shared_queue
+                shared_queue.put((0, 1))
+                self.assertNotIn("FULL", output.getvalue())
+                shared_queue.put((1, 2.5))
+                self.assertIn("[MainThread] !!! Queue is FULL! Consumer notified", output.getvalue())
+                shared_queue.get()
+                self.assertNotIn("EMPTY", output.getvalue())
+                shared_queue.get()
+            self.assertIn("[MainThread] !!! Queue is EMPTY. Producer notified !!!", output.getvalue())
+            self.assertEqual(output.getvalue().count("!!!"), 3)
+            
+            # The same transitions wake wait_until_full/wait_until_empty; close() releases a waiter short of the level
+            filler = threading.Timer(0.02, lambda: (shared_queue.put((0, 1)), shared_queue.put((1, 2.5))))
+            with redirect_stdout(io.StringIO()):
+                filler.start()
+                self.assertTrue(shared_queue.wait_until_full(timeout=1))
+                shared_queue.get()
+                threading.Timer(0.02, shared_queue.close).start()
+                self.assertFalse(shared_queue.wait_until_empty(timeout=1), "Closed with one item left")
+            filler.join()
+            self.assertEqual(shared_queue.level_waiters, 0)
+        
+        with redirect_stdout(io.StringIO()):
+            self.assertIsNone(ProducerConsumer([1, 2.5], batch_size=2).shared_queue.on_level)
+        print("✓ Test passed: Notifications")
+    
+    def test_shutdown_has_no_polling_delay(self):
+        """Consumers stop as soon as the last producer finishes instead of after a 0.1 s poll"""
+        print("\n=== Shutdown: No tail latency ===")
+        for options in ({'batch_size': 2}, {'batch_size': 2, 'channel': 'ring'},
+                        {'batch_size': 2, 'producers': 3, 'consumers': 4}):
+            timings = []
+            for _ in range(3):
+                with redirect_stdout(io.StringIO()):
+                    pc = ProducerConsumer([1, 2.5, 3], **options)
+                    start = time.perf_counter()
+                    pc.run()
+                    timings.append(time.perf_counter() - start)
+                    self.assertTrue(pc.verify())
+            self.assertLess(min(timings), 0.05, f"Shutdown took too long with {options}")
+        print("✓ Test passed: No tail latency")
+    
+    def test_failed_producer_still_releases_consumers(self):
+        """A producer that raises still closes the queue, so run() returns and verify() fails"""
+        print("\n=== Shutdown: Failed producer ===")
+        with redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            pc = ProducerConsumer(list(range(10)), batch_size=2)
+            put_segment = pc.shared_queue.put_segment
+            
+            def failing_put_segment(start, items, *args, **kwargs):
+                if start >= 4:
+                    raise RuntimeError("source read failed")
+                return put_segment(start, items, *args, **kwargs)
+            
+            pc.shared_queue.put_segment = failing_put_segment
+            runner = threading.Thread(target=pc.run)
+            with mock.patch.object(threading, 'excepthook', lambda args: None):
+                runner.start()
+                runner.join(timeout=2)
+            self.assertFalse(runner.is_alive(), "Consumers should not wait forever")
+            self.assertFalse(pc.verify())
+        self.assertEqual(pc.filled_destination(), [0, 1, 2, 3])
+        print("✓ Test passed: Failed producer")
+
+
+class TestTypedTransfer(unittest.TestCase):
+    """Tests for the zero-copy typed buffer path"""
+    
+    def run_typed(self, source, tags=None, **options):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc = TypedProducerConsumer(source, tags, **options)
+            pc.run()
+            success = pc.verify()
+        return pc, output.getvalue(), success
+    
+    def test_typed_arrays_by_format(self):
+        """int64 and float64 arrays are copied into a destination buffer of the same format"""
+        print("\n=== Typed: Arrays ===")
+        for source in (array('q', range(-500, 501)), array('d', [i / 3 for i in range(1001)]),
+                       array('i', [7, -8, 9]), array('d'), array('d', [float('nan'), 1.5])):
+            pc, _, success = self.run_typed(source, batch_size=64)
+            self.assertTrue(success, f"Verification should pass for {source.typecode!r}")
+            self.assertEqual(pc.destination_container.format, source.typecode)
+            self.assertEqual(bytes(pc.destination_container), source.tobytes())
+            self.assertEqual(pc.shared_queue.maxsize, len(source) // 2)
+        print("✓ Test passed: Typed arrays")
+    
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_typed_numpy_source(self):
+        """NumPy arrays, including 2-D ones, go through the same path without a copy"""
+        print("\n=== Typed: NumPy ===")
+        source = numpy.arange(10_000, dtype='float64').reshape(100, 100)
+        pc, _, success = self.run_typed(source, batch_size=999, producers=3, consumers=2)
+        self.assertTrue(success)
+        self.assertTrue(numpy.array_equal(numpy.frombuffer(pc.destination_container, dtype='float64'),
+                                          source.ravel()))
+        self.assertEqual(pc.kind, 'float')
+        print("✓ Test passed: Typed NumPy source")
+    
+    def test_tagged_words_keep_int_float_distinction(self):
+        """int64 words with per-item tags decode back to the original ints and floats"""
+        print("\n=== Typed: Tagged words ===")
+        numbers = [1, 2.5, 3, -4.7, 2**62, 1e308, -0.0, 13]
+        words, tags = to_typed(numbers)
+        
+        pc, output, success = self.run_typed(words, tags, batch_size=3, consumers=2)
+        
+        self.assertTrue(success)
+        self.assertEqual(pc.filled_destination(), numbers)
+        self.assertEqual([type(x) for x in pc.filled_destination()], [type(x) for x in numbers])
+        self.assertIn("[1, 2.5, 3, -4.7", output)
+        with redirect_stdout(io.StringIO()):
+            with self.assertRaises(ValueError):
+                TypedProducerConsumer(array('d', [1.0]), tags)
+        print("✓ Test passed: Tagged words")
+    
+    def test_segments_are_views_and_respect_capacity(self):
+        """Queued segments reference the source buffer and never exceed maxsize items in total"""
+        print("\n=== Typed: Segment queue ===")
+        source = array('q', range(10))
+        shared_queue = SegmentQueue(maxsize=4)
+        shared_queue.put_segment(0, memoryview(source)[0:3])
+        self.assertEqual(shared_queue.qsize(), 3)
+        with self.assertRaises(queue.Full):
+            shared_queue.put_segment(3, memoryview(source)[3:10], timeout=0.01)
+        self.assertEqual(shared_queue.qsize(), 4, "The part that fits is queued, split at the free room")
+        
+        start, values, tags = shared_queue.get()
+        self.assertEqual((start, values.tolist(), tags), (0, [0, 1, 2], None))
+        self.assertIs(values.obj, source, "Segments should be views, not copies")
+        start, values, _ = shared_queue.get()
+        self.assertEqual((start, values.tolist()), (3, [3]))
+        self.assertTrue(shared_queue.empty())
+        print("✓ Test passed: Segment queue")
+    
+    def test_typed_verify_detects_corruption(self):
+        """A changed byte in the destination fails verification and is located"""
+        print("\n=== Typed: Corruption ===")
+        pc, _, success = self.run_typed(array('d', [1.5, 2.5, 3.5, 4.5]), batch_size=2)
+        self.assertTrue(success)
+        pc.destination_container[2] = -1.0
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(pc.verify())
+        self.assertIn("Index 2: expected 3.5, got -1.0", output.getvalue())
+        
+        # NaNs with identical bits are not mismatches; changed items and tags in a large buffer are found
+        numbers = [float('nan') if i % 3 == 0 else i for i in range(100_000)]
+        words, tags = to_typed(numbers)
+        pc, _, success = self.run_typed(words, tags, batch_size=4096)
+        self.assertTrue(success)
+        pc.destination_container[70_001] = 5
+        pc.destination_tags[90_001] = 1 - pc.destination_tags[90_001]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc._show_mismatches()
+        self.assertEqual([line.split(':')[0].strip() for line in output.getvalue().splitlines()],
+                         ["Index 70001", "Index 90001"])
+        print("✓ Test passed: Typed corruption")
+
+
+class TestStreamingVerification(unittest.TestCase):
+    """Tests for checksum-based verification and mismatch localization"""
+    
+    def test_checksums_ignore_arrival_order_only(self):
+        """Arrival order and worker split do not matter; positions and int/float types do"""
+        print("\n=== Checksums: Order sensitivity ===")
+        segments = [(0, [1, 2.5]), (2, [3, 4.7, 5]), (5, [6.3])]
+        
+        forward, backward = TransferChecksum(), TransferChecksum()
+        for start, items in segments:
+            forward.add_segment(start, items)
+        split = [TransferChecksum(), TransferChecksum()]
+        for i, (start, items) in enumerate(reversed(segments)):
+            split[i % 2].add_segment(start, items)
+        self.assertEqual(forward.digest(), TransferChecksum.combine(split).digest())
+        
+        moved = TransferChecksum()
+        moved.add_segment(0, [1, 2.5])
+        moved.add_segment(3, [3, 4.7, 5])
+        moved.add_segment(5, [6.3])
+        self.assertNotEqual(moved.ordered, forward.ordered, "A segment written elsewhere changes the order digest")
+        self.assertEqual(moved.unordered, forward.unordered, "...but not the multiset digest")
+        
+        self.assertNotEqual(TransferChecksum.of([1, 2]).digest(), TransferChecksum.of([1.0, 2]).digest())
+        single = TransferChecksum()
+        single.add_pair(0, 7)
+        self.assertEqual(single.digest(), TransferChecksum.of([7]).digest())
+        print("✓ Test passed: Checksum order sensitivity")
+    
+    def test_verify_uses_streamed_checksums(self):
+        """verify() compares checksums recorded during the run with one re-read of the destination"""
+        print("\n=== Checksums: Streamed verification ===")
+        source_data = [i * 0.5 if i % 2 else i for i in range(10_001)]
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc = ProducerConsumer(source_data, batch_size=256, producers=2, consumers=3)
+            pc.run()
+            with mock.patch('Asgn_2.verify_containers', side_effect=AssertionError("full scan")):
+                self.assertTrue(pc.verify())
+            
+            # A consumer that wrote one segment twice is caught by the counts and the order digest
+            pc.consumer_checksums[0].add_segment(0, source_data[:3])
+            success, _, _, failed = pc.verification_checks()
+        self.assertFalse(success)
+        self.assertEqual([name for name, _, _ in failed], ["Elements in order", "All elements present"])
+        print("✓ Test passed: Streamed verification")
+    
+    def test_reorder_inside_segment_is_not_missing_data(self):
+        """Swapped items fail the order check only, like verify_containers, in any segmentation"""
+        print("\n=== Checksums: Reorder inside a segment ===")
+        with redirect_stdout(io.StringIO()):
+            pc = ProducerConsumer(list(range(1000)), batch_size=100)
+            pc.run()
+        destination = pc.destination_container
+        destination[0], destination[1] = destination[1], destination[0]
+        destination[150], destination[250] = destination[250], destination[150]
+
+        _, checks, _, _ = pc.verification_checks()
+        _, baseline, _, _ = verify_containers(pc.source_container, destination)
+        self.assertEqual(checks, baseline)
+        self.assertEqual([passed for _, passed, _ in checks], [True, False, True])
+
+        destination[0] = 7
+        _, checks, _, _ = pc.verification_checks()
+        self.assertEqual(checks[2], ("All elements present", False, "Missing or duplicated"))
+
+        items = [3, 2.5, 2**70, True, -1, 1.0, 'x']
+        self.assertEqual(multiset_hash(items), multiset_hash(items[4:]) + multiset_hash(items[3::-1]))
+        self.assertNotEqual(multiset_hash([-1]), multiset_hash([-2]))
+        self.assertNotEqual(multiset_hash([1]), multiset_hash([1.0]))
+        self.assertNotEqual(multiset_hash([1, 3]), multiset_hash([2, 2]))
+        print("✓ Test passed: Reorder inside a segment")
+
+    def test_checksums_do_not_collide_on_builtin_hash(self):
+        """Values whose built-in hash() is equal still get different checksums and are located"""
+        print("\n=== Checksums: hash() collisions ===")
+        self.assertEqual(hash(-1), hash(-2))
+        self.assertNotEqual(TransferChecksum.of([-1]).digest(), TransferChecksum.of([-2]).digest())
+        self.assertNotEqual(TransferChecksum.of([0]).digest(), TransferChecksum.of([2**61 - 1]).digest())
+        self.assertNotEqual(TransferChecksum.of([0.0]).digest(), TransferChecksum.of([-0.0]).digest())
+        
+        source = [-1] * 1000
+        destination = list(source)
+        destination[499] = -2
+        self.assertEqual(locate_mismatches(source, destination), [499])
+        
+        with redirect_stdout(io.StringIO()):
+            pc = ProducerConsumer([-1, 0, 3, 4.5], batch_size=2)
+            pc.run()
+            pc.destination_container[0] = -2
+            pc.destination_container[1] = 2**61 - 1
+            self.assertFalse(pc.verify())
+        print("✓ Test passed: hash() collisions")
+    
+    def test_locate_mismatches_by_bisection(self):
+        """Chunked hash bisection finds changed, retyped and missing items in order"""
+        print("\n=== Checksums: Mismatch localization ===")
+        source = [i * 0.5 if i % 2 else i for i in range(100_000)]
+        destination = list(source)
+        destination[17] = -1
+        destination[50_000] = 50_000.0
+        destination[77_777] = None
+        
+        self.assertEqual(locate_mismatches(source, destination), [17, 50_000, 77_777])
+        self.assertEqual(locate_mismatches(source, destination, max_show=2), [17, 50_000])
+        self.assertEqual(locate_mismatches(source, source[:-2]), [99_998, 99_999])
+        self.assertEqual(locate_mismatches(source, list(source)), [])
+        
+        with redirect_stdout(io.StringIO()):
+            pc = ProducerConsumer([1, 2.5, 3, 4.7], batch_size=2)
+            pc.run()
+        pc.destination_container[1] = 2
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertFalse(pc.verify(), "A destination changed after the run fails verification")
+        self.assertIn("X Elements in order", output.getvalue())
+        self.assertIn("Index 1: expected 2.5, got 2", output.getvalue())
+        
+        with redirect_stdout(io.StringIO()):
+            pc.destination_container[:] = [9, 9, 9, 9]
+            self.assertFalse(pc.verify())
+            
+            per_item = ProducerConsumer([1, 2.5, 3, 4.7])
+            per_item.run()
+            per_item.destination_container.clear()
+            success, _, _, failed = per_item.verification_checks()
+        self.assertFalse(success)
+        self.assertEqual(failed[0][:2], ("Length match", False))
+        self.assertEqual(failed[0][2], "Source: 4, Destination: 0")
+        print("✓ Test passed: Mismatch localization")
+
+
+class TestAsyncPipeline(unittest.TestCase):
+    """Tests for the asyncio variant with async sources and sinks"""
+    
+    def run_async(self, pc):
+        with redirect_stdout(io.StringIO()):
+            asyncio.run(pc.run())
+            return pc.verify()
+    
+    def test_async_single_stream_preserves_order_and_bound(self):
+        """One source and one sink keep order, and the channel never exceeds half the declared size"""
+        print("\n=== Async: Order and backpressure ===")
+        source_data = [1, 2.5, 3, 4.7, 5, 6.3, 7, 8.9, 9, 10.1, 11]
+        sizes = []
+        
+        class RecordingSink(ListSink):
+            async def __call__(self, item):
+                sizes.append(pc.channel.qsize())
+                await super().__call__(item)
+        
+        sink = RecordingSink(delay=0.001)
+        with redirect_stdout(io.StringIO()):
+            pc = AsyncProducerConsumer([iterate(source_data)], [sink], declared_size=len(source_data))
+        
+        self.assertTrue(self.run_async(pc))
+        self.assertEqual(sink.items, source_data)
+        self.assertEqual(pc.channel.maxsize, 5, "Queue size should be 11 // 2 = 5")
+        self.assertLessEqual(max(sizes), 5)
+        self.assertEqual(max(sizes), 4, "A slow sink should let the producer fill the channel")
+        print("✓ Test passed: Async order and backpressure")
+    
+    def test_async_thousands_of_tasks(self):
+        """Thousands of producer and consumer tasks deliver every item exactly once"""
+        print("\n=== Async: Thousands of tasks ===")
+        sources = [iterate(range(p * 10, p * 10 + 10), delay=0.001) for p in range(2000)]
+        sinks = [ListSink() for _ in range(1500)]
+        with redirect_stdout(io.StringIO()):
+            pc = AsyncProducerConsumer(sources, sinks, maxsize=64)
+        
+        self.assertTrue(self.run_async(pc))
+        self.assertEqual(sorted(item for sink in sinks for item in sink.items), list(range(20_000)))
+        print("✓ Test passed: Async thousands of tasks")
+    
+    def test_async_channel_events_and_close(self):
+        """Full/empty are awaitable events and a closed channel drains before it stops"""
+        print("\n=== Async: Channel events and close ===")
+        
+        async def scenario():
+            channel = AsyncChannel(2)
+            waiter = asyncio.create_task(channel.wait_full())
+            await channel.put(1)
+            await asyncio.sleep(0)
+            self.assertFalse(waiter.done())
+            await channel.put(2.5)
+            await asyncio.wait_for(waiter, 1)
+            
+            blocked = asyncio.create_task(channel.put(3))
+            await asyncio.sleep(0.01)
+            self.assertFalse(blocked.done(), "put() should wait while the channel is full")
+            self.assertEqual(await channel.get(), 1)
+            await asyncio.wait_for(blocked, 1)
+            
+            closing = asyncio.create_task(channel.close())
+            self.assertEqual([await channel.get(), await channel.get()], [2.5, 3])
+            await asyncio.wait_for(channel.wait_empty(), 1)
+            await closing
+            for _ in range(3):
+                with self.assertRaises(ChannelClosed):
+                    await channel.get()
+            with self.assertRaises(ChannelClosed):
+                await channel.put(4)
+        
+        asyncio.run(scenario())
+        print("✓ Test passed: Async channel events and close")
+    
+    def test_async_failing_sink_does_not_hang(self):
+        """A sink that raises cancels the other tasks instead of leaving producers blocked"""
+        print("\n=== Async: Failing sink ===")
+        
+        async def failing_sink(item):
+            raise RuntimeError(item)
+        
+        with redirect_stdout(io.StringIO()):
+            pc = AsyncProducerConsumer([iterate(range(100))], [failing_sink], maxsize=2)
+            with self.assertRaises(RuntimeError):
+                asyncio.run(asyncio.wait_for(pc.run(), 5))
+            with self.assertRaises(ValueError):
+                AsyncProducerConsumer([iterate([1])], [ListSink()])
+        print("✓ Test passed: Async failing sink")
+
+
+class TestProcessBackend(unittest.TestCase):
+    """Tests for consumer processes fed through a shared memory ring buffer"""
+    
+    def run_processes(self, source_data, consumers=2, batch_size=4, work=None):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            pc = ProcessProducerConsumer(source_data, consumers, batch_size, work)
+            pc.run()
+            success = pc.verify()
+        return pc, output.getvalue(), success
+    
+    def test_process_transfer_preserves_order_and_types(self):
+        """Ints and floats keep their values, order and types through shared memory"""
+        print("\n=== Process: Order and types ===")
+        source_data = [1, 2.5, 3, -4.7, 5, 6.3, 2**62, 8.9, -9, 1e308, 0, -0.0, 13]
+        
+        pc, output, success = self.run_processes(source_data, consumers=3, batch_size=4)
+        
+        self.assertTrue(success, "Verification should pass")
+        self.assertEqual(pc.destination_container, source_data)
+        self.assertEqual([type(x) for x in pc.destination_container], [type(x) for x in source_data])
+        self.assertEqual(pc.queue_capacity, 6, "Ring capacity should be 13 // 2 = 6")
+        self.assertEqual((pc.actor_name("Producer", 0), pc.partitions, pc.consumers), ("Producer", [(0, 13)], 3),
+                         "The shared worker setup applies to the process backend too")
+        self.assertIn("[Consumer-3] O Finished", output)
+        print("✓ Test passed: Process order and types")
+    
+    def test_process_edge_sizes(self):
+        """Empty, single-element and two-element sources"""
+        print("\n=== Process: Edge sizes ===")
+        for source_data in ([], [42.5], [1, 2.5]):
+            pc, _, success = self.run_processes(source_data, consumers=2, batch_size=3)
+            self.assertTrue(success)
+            self.assertEqual(pc.destination_container, source_data)
+        print("✓ Test passed: Process edge sizes")
+    
+    def test_process_large_transfer_wraps_ring(self):
+        """Batch sizes that do not divide the ring force wrapped reads and writes"""
+        print("\n=== Process: Large transfer ===")
+        source_data = [i * 0.5 if i % 2 else i for i in range(50_001)]
+        
+        pc, _, success = self.run_processes(source_data, consumers=3, batch_size=977)
+        
+        self.assertTrue(success, "Verification should pass")
+        self.assertEqual(pc.destination_container, source_data)
+        self.assertEqual(ring_segments(8, 5, 10), [(8, 10), (0, 3)])
+        self.assertEqual(ring_segments(3, 4, 10), [(3, 7)])
+        print("✓ Test passed: Process large transfer")
+    
+    def test_process_worker_failure_raises(self):
+        """A consumer that dies stops the run instead of leaving the others blocked"""
+        print("\n=== Process: Worker failure ===")
+        with redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            pc = ProcessProducerConsumer(list(range(100)) + [-1] + list(range(100)), 2, 8, reject_negative)
+            with self.assertRaises(RuntimeError):
+                pc.run()
+            with self.assertRaises(ValueError):
+                ProcessProducerConsumer([2**64, 1.5]).run()
+        print("✓ Test passed: Process worker failure")
+
+
+class TestMetrics(unittest.TestCase):
+    """Tests for the opt-in transfer metrics and the load-test sweep"""
+    
+    def run_metered(self, source_data, **options):
+        with redirect_stdout(io.StringIO()):
+            pc = ProducerConsumer(source_data, metrics=True, **options)
+            pc.run()
+            success = pc.verify()
+        return pc, success
+    
+    def test_histogram_buckets_and_percentiles(self):
+        """Power-of-two buckets, exact count/min/max/mean, percentiles capped at the max"""
+        print("\n=== Metrics: Histogram ===")
+        self.assertEqual([bucket_of(v, base=1) for v in (0, 1, 1.5, 2, 3, 4, 5)], [0, 0, 1, 1, 2, 2, 3])
+        
+        histogram = Histogram(base=1)
+        for value in range(1, 101):
+            histogram.add(value)
+        histogram.add(1000, weight=10)
+        self.assertEqual(histogram.count, 110)
+        self.assertEqual((histogram.min, histogram.max), (1, 1000))
+        self.assertAlmostEqual(histogram.mean(), (5050 + 10_000) / 110)
+        self.assertEqual(histogram.percentile(50), 64, "The 55th value (55) lies in the (32, 64] bucket")
+        self.assertEqual(histogram.percentile(99), 1000, "Capped at the largest value, not the 1024 bound")
+        self.assertEqual(sum(b['count'] for b in histogram.to_dict()['buckets']), 110)
+        self.assertIsNone(Histogram().percentile(50))
+        print("✓ Test passed: Histogram")
+    
+    def test_batched_metrics_report(self):
+        """Throughput, blocking, latency and depth are recorded and survive a JSON round trip"""
+        print("\n=== Metrics: Batched report ===")
+        source_data = [i * 0.5 if i % 2 else i for i in range(20_000)]
+        pc, success = self.run_metered(source_data, batch_size=500, producers=2, consumers=2, queue_capacity=100)
+        self.assertTrue(success)
+        
+        report = json.loads(pc.metrics.to_json())
+        self.assertEqual(report['items'], 20_000)
+        self.assertEqual(report['queue_capacity'], 100)
+        self.assertGreater(report['items_per_sec'], 0)
+        self.assertEqual(report['latency_seconds']['count'], 20_000, "One latency per item")
+        self.assertGreaterEqual(report['latency_seconds']['min'], 0)
+        self.assertEqual(sum(w['items'] for w in report['producer_blocked_on_full']['per_worker']), 20_000)
+        self.assertGreater(report['producer_blocked_on_full']['calls'], 0,
+                           "Batches of 500 never fit a 100-item queue at once")
+        self.assertGreater(report['consumer_blocked_on_empty']['calls'], 0, "The final gets wait for close()")
+        self.assertLessEqual(report['queue_depth']['max'], 100)
+        self.assertGreaterEqual(len(report['queue_depth']['samples']), 2)
+        self.assertEqual(report['queue_depth']['samples'][-1][2], 20_000, "The last sample sees every item")
+        self.assertEqual(pc.shared_queue.stamps, {}, "Every stamped segment was dequeued")
+        self.assertNotIn('samples', pc.metrics.report(samples=False)['queue_depth'])
+        print("✓ Test passed: Batched report")
+    
+    def test_metrics_in_every_mode(self):
+        """Per-item mode, the ring and the typed path record one latency per item; off by default"""
+        print("\n=== Metrics: Modes ===")
+        pc, success = self.run_metered([1, 2.5, 3, 4.7, 5, 6.3])
+        self.assertTrue(success)
+        self.assertEqual(pc.metrics.latency().count, 6)
+        self.assertEqual([w.items for w in pc.metrics.producers], [6])
+        
+        pc, success = self.run_metered(list(range(5000)), batch_size=64, channel='ring')
+        self.assertTrue(success)
+        self.assertEqual(pc.metrics.report()['latency_seconds']['count'], 5000)
+        
+        words, tags = to_typed([i * 0.5 for i in range(3000)])
+        with redirect_stdout(io.StringIO()):
+            typed = TypedProducerConsumer(words, tags, batch_size=256, consumers=2, metrics=True)
+            typed.run()
+            self.assertTrue(typed.verify())
+            plain = ProducerConsumer([1, 2.5], batch_size=1)
+            plain.run()
+        self.assertEqual(typed.metrics.latency().count, 3000)
+        self.assertIsNone(plain.metrics)
+        self.assertIsNone(plain.shared_queue.stamps, "No timestamps without metrics")
+        print("✓ Test passed: Metrics modes")
+    
+    def test_load_test_sweep(self):
+        """The sweep runs every size x capacity x workers combination and writes JSON reports"""
+        print("\n=== Metrics: Load test ===")
+        output = io.StringIO()
+        with redirect_stdout(output):
+            results = run_load_test(sizes=[1000, 3001], capacities=[16, None], workers=[(1, 1), (2, 3)], batch_size=100)
+        self.assertEqual(len(results), 8)
+        self.assertEqual([(r['source_size'], r['queue_capacity'], r['producers'], r['consumers']) for r in results[4:]],
+                         [(3001, 16, 1, 1), (3001, 16, 2, 3), (3001, 1500, 1, 1), (3001, 1500, 2, 3)])
+        self.assertTrue(all(r['items'] == r['source_size'] for r in results))
+        self.assertIn("Load Test", output.getvalue())
+        
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'load.json')
+            with redirect_stdout(io.StringIO()):
+                load_test_main(['--sizes', '500', '--capacities', 'half', '0', '--workers', '2x1', '--json', path])
+            with open(path) as file:
+                reports = json.load(file)['results']
+        self.assertEqual([r['queue_capacity'] for r in reports], [250, 0])
+        print("✓ Test passed: Load test")
+
+
 def run_tests():
     """Run all tests with detailed output"""
     print("=" * 70)
@@ -305,6 +1174,15 @@ def run_tests():
     
     suite.addTests(loader.loadTestsFromTestCase(TestProducerConsumer))
     suite.addTests(loader.loadTestsFromTestCase(TestEdgeCases))
+    suite.addTests(loader.loadTestsFromTestCase(TestBatchedMode))
+    suite.addTests(loader.loadTestsFromTestCase(TestMultiProducerConsumer))
+    suite.addTests(loader.loadTestsFromTestCase(TestRingBuffer))
+    suite.addTests(loader.loadTestsFromTestCase(TestEventDrivenShutdown))
+    suite.addTests(loader.loadTestsFromTestCase(TestTypedTransfer))
+    suite.addTests(loader.loadTestsFromTestCase(TestStreamingVerification))
+    suite.addTests(loader.loadTestsFromTestCase(TestAsyncPipeline))
+    suite.addTests(loader.loadTestsFromTestCase(TestProcessBackend))
+    suite.addTests(loader.loadTestsFromTestCase(TestMetrics))
     
     runner = unittest.TextTestRunner(verbosity=2)
     result = runner.run(suite)
@@ -0,0 +1,191 @@
+import argparse
+import time
+from array import array
+
+from Asgn_2 import ProducerConsumer, QueueClosed, SegmentQueue, print_section_header
+from checksums import bisect_mismatches
+from metrics import lacks_room
+from process_backend import decode_numbers, encode_numbers
+
+# Buffer formats the typed path accepts; 'l'/'L' are what NumPy's int64/uint64 export on Linux
+INT_FORMATS = 'bBhHiIlLqQ'
+FLOAT_FORMATS = 'fd'
+
+# Helper Functions
+
+def flat_view(buffer):
+    # One-dimensional memoryview over any C-contiguous buffer (NumPy array, array.array, bytes, ...)
+    view = memoryview(buffer)
+    fmt = view.format.lstrip('@')
+    if fmt not in INT_FORMATS + FLOAT_FORMATS:
+        raise TypeError(f"Unsupported buffer format {view.format!r}; need a native int or float format")
+    if view.ndim != 1 or view.format != fmt:
+        view = view.cast('B').cast(fmt)
+    return view
+
+def typed_buffer(fmt, length):
+    # Preallocated, zero-filled typed destination
+    return memoryview(bytearray(length * array(fmt).itemsize)).cast(fmt)
+
+def to_typed(numbers):
+    # Packs a list of ints and floats into int64 words plus a float/int tag per item
+    words, tags = typed_buffer('q', len(numbers)), typed_buffer('b', len(numbers))
+    encode_numbers(numbers, words, tags)
+    return words, tags
+
+
+# ProducerConsumer over typed buffers: slices of the source travel as views and land in a typed destination
+
+class TypedProducerConsumer(ProducerConsumer):
+    def __init__(self, source, tags=None, batch_size: int = 65536, producers: int = 1, consumers: int = 1,
+                 metrics: bool = False):
+        # Task 1: The source buffer is used in place, not copied; it must not change during run()
+        self.source_container = flat_view(source)
+        self.source_tags = None if tags is None else flat_view(tags)
+        source_capacity = len(self.source_container)
+        fmt = self.source_container.format
+
+        # Type tag: the buffer format says int or float, or a per-item tag does for int64 words
+        if self.source_tags is not None:
+            if fmt not in 'qlQL' or self.source_container.itemsize != 8 or len(self.source_tags) != source_capacity:
+                raise ValueError("Per-item tags need 8-byte words and one tag per item (see to_typed)")
+            self.kind = 'tagged'
+        else:
+            self.kind = 'float' if fmt in FLOAT_FORMATS else 'int'
+
+        # Task 2: Destination buffer of the same type and capacity
+        self.destination_container = typed_buffer(fmt, source_capacity)
+        self.destination_tags = None if self.source_tags is None else typed_buffer('b', source_capacity)
+
+        # Task 3: Queue with half the capacity of source, counted in items
+        queue_capacity = source_capacity // 2
+        if batch_size < 1:
+            raise ValueError("Need a positive batch size")
+        self.init_workers(source_capacity, SegmentQueue(maxsize=queue_capacity), 'queue', batch_size,
+                          producers, consumers, metrics)
+
+        print("Initialized:")
+        print(f"  Source capacity: {source_capacity}")
+        print(f"  Queue capacity: {queue_capacity}")
+        print(f"  Typed buffer: format {fmt!r} ({self.kind}), batch size: {batch_size}")
+        if producers > 1 or consumers > 1:
+            print(f"  Producers: {producers}, Consumers: {consumers}")
+        print(f"  Source data: {self._format_list_preview(self.to_list(self.source_container, self.source_tags, 11))}")
+
+    def to_list(self, values, tags, limit=None):
+        end = len(values) if limit is None else min(limit, len(values))
+        if tags is None:
+            return values[:end].tolist()
+        return decode_numbers(values, tags, 0, end)
+
+    def batch_producer(self, worker: int = 0):
+        source, tags, size = self.source_container, self.source_tags, self.batch_size
+        start, end = self.partitions[worker]
+        metrics = self.metrics and self.metrics.producers[worker]
+        try:
+            for batch_start in range(start, end, size):
+                batch_end = min(end, batch_start + size)
+                if metrics:
+                    waited, began = lacks_room(self.shared_queue, batch_end - batch_start), time.perf_counter()
+                # Slicing a memoryview copies nothing; the consumer reads straight from the source buffer
+                self.shared_queue.put_segment(batch_start, source[batch_start:batch_end],
+                                              None if tags is None else tags[batch_start:batch_end])
+                if metrics:
+                    metrics.record(batch_end - batch_start, waited, time.perf_counter() - began)
+        finally:
+            self.producer_finished()
+
+    def batch_consumer(self, worker: int = 0):
+        destination, destination_tags = self.destination_container, self.destination_tags
+        metrics = self.metrics and self.metrics.consumers[worker]
+        while True:
+            if metrics:
+                depth, began = self.shared_queue.qsize(), time.perf_counter()
+            try:
+                start, values, tags = self.shared_queue.get()
+            except QueueClosed:
+                if metrics:
+                    metrics.record(0, not depth, time.perf_counter() - began)
+                break
+            if metrics:
+                metrics.received(start, len(values), depth, began)
+
+            # One memcpy per segment, into slots no other consumer writes
+            end = start + len(values)
+            destination[start:end] = values
+            if tags is not None:
+                destination_tags[start:end] = tags
+            self.shared_queue.task_done()
+
+    def filled_destination(self):
+        return self.to_list(self.destination_container, self.destination_tags)
+
+    def verification_checks(self):
+        # Byte comparisons: exact for a copy, NaN-safe, and no boxing of the items
+        checks = []
+        source, destination = self.source_container, self.destination_container
+        length_match = len(source) == len(destination)
+        checks.append(("Length match", length_match,
+                       f"{len(source)} elements" if length_match else
+                       f"Source: {len(source)}, Destination: {len(destination)}"))
+
+        values_match = source.cast('B') == destination.cast('B')
+        checks.append(("Elements in order", values_match, "All correct" if values_match else "Mismatches found"))
+
+        if self.source_tags is not None:
+            tags_match = self.source_tags == self.destination_tags
+            checks.append(("Type tags", tags_match, "All correct" if tags_match else "Int/float tags differ"))
+
+        passed = [c for c in checks if c[1]]
+        failed = [c for c in checks if not c[1]]
+        return all(c[1] for c in checks), checks, passed, failed
+
+    def item(self, values, tags, i):
+        return self.to_list(values[i:i + 1], None if tags is None else tags[i:i + 1])[0]
+
+    def bytes_differ(self, start, end):
+        # Same byte comparison as verification_checks, so NaNs with identical bits match
+        if self.source_container[start:end].tobytes() != self.destination_container[start:end].tobytes():
+            return True
+        return self.source_tags is not None and self.source_tags[start:end] != self.destination_tags[start:end]
+
+    def _show_mismatches(self, max_show=5):
+        # Bisection over byte ranges; only ranges that differ are compared item by item
+        source, destination = self.source_container, self.destination_container
+        mismatches = bisect_mismatches(len(source), self.bytes_differ, lambda i: self.bytes_differ(i, i + 1), max_show)
+        for i in mismatches:
+            print(f"    Index {i}: expected {self.item(source, self.source_tags, i)}, "
+                  f"got {self.item(destination, self.destination_tags, i)}")
+
+    def display_summary(self):
+        print(f"\nSource Container ({len(self.source_container)} items):")
+        print(f"  {self._format_list_preview(self.to_list(self.source_container, self.source_tags, 11))}")
+
+        print(f"\nDestination Container ({len(self.destination_container)} items):")
+        print(f"  {self._format_list_preview(self.to_list(self.destination_container, self.destination_tags, 11))}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Zero-copy producer-consumer transfer of a typed buffer")
+    parser.add_argument('--items', type=float, default=1e6, help="number of items to transfer")
+    parser.add_argument('--batch-size', type=int, default=65536)
+    parser.add_argument('--kind', choices=['int', 'float', 'tagged'], default='tagged',
+                        help="int64 array, float64 array, or int64 words with per-item int/float tags")
+    args = parser.parse_args(argv)
+
+    items = int(args.items)
+    if args.kind == 'tagged':
+        source, tags = to_typed([i if i % 2 == 0 else i + 0.5 for i in range(items)])
+    else:
+        source, tags = array('q' if args.kind == 'int' else 'd', range(items)), None
+
+    print_section_header("Producer-Consumer Problem (typed buffers)")
+
+    pc = TypedProducerConsumer(source, tags, args.batch_size)
+    pc.run()
+    pc.verify()
+    pc.display_summary()
+
+
+if __name__ == "__main__":
+    main()